@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the Enhanced Finploy Sitemap Generator
+Serves a synthetic job site locally and crawls it end to end
+"""
+
+import argparse
+import gzip
+import http.server
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import logging
+import xml.etree.ElementTree as ET
+from urllib.parse import urlparse, parse_qs
+
+from bs4 import BeautifulSoup
+
+from sitemap import EnhancedFinploySitemapGenerator, SQLiteBroker, distributed_worker_settings
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+# Metrics compared against the baseline, and which direction is better
+TRACKED_METRICS = {
+    'pages_per_sec': 'higher',
+    'fetch_p50_ms': 'lower',
+    'fetch_p95_ms': 'lower',
+    'parse_p50_ms': 'lower',
+    'parse_p95_ms': 'lower',
+    'peak_rss_mb': 'lower',
+    'peak_child_rss_mb': 'lower',
+    'bytes_downloaded': 'lower',
+    'extract_fast_ms_per_page': 'lower',
+    'extract_soup_ms_per_page': 'lower',
+    'sitemap_write_sec': 'lower',
+    'recall': 'higher',
+}
+
+
+class SyntheticSite:
+    """Deterministic job site model shared by the server and the checks
+
+    Listing pages (/jobs?page=N, mirrored at /jobs?page=N&sort=recent)
+    link job pages through anchors, data-href cards and inline-script
+    routes. Career pages (/careers/N) are only reachable through routes in
+    the shared /static/app.js bundle, which job pages load under a
+    cache-busting URL with the same content. Job pages share a template (a
+    navigation bar of about 60 links and a few hundred words of footer
+    boilerplate) around a short unique description, so their content
+    fingerprints are close while their links differ. The site also has
+    companies, locations, a redirect (/old-jobs/N), missing pages
+    (/expired/N), slow pages (/slow/N), rate-limited pages (/busy/N, 429 on
+    the first hit), an oversized page (/archive), a large JSON feed,
+    robots.txt (listing one sitemap found nowhere else) and a nested, partly
+    gzipped sitemap index.
+    """
+
+    def __init__(self, pages=2000, jobs_per_listing=50, slow_ms=200, seed=7,
+                 base_url='http://127.0.0.1'):
+        self.base_url = base_url
+        self.jobs = pages
+        self.jobs_per_listing = jobs_per_listing
+        self.listings = max(1, (pages + jobs_per_listing - 1) // jobs_per_listing)
+        self.companies = max(1, pages // 40)
+        self.locations = max(1, pages // 100)
+        self.extras = max(1, pages // 200)  # redirects, 404s, slow and busy pages each
+        self.careers = max(1, pages // 100)
+        self.slow_ms = slow_ms
+        self.seed = seed
+        self.archive_bytes = 6 * 1024 * 1024  # over the default max_body_bytes
+        self.feed_bytes = 2 * 1024 * 1024
+        rng = random.Random(seed)
+        self.vocabulary = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 9)))
+                           for _ in range(2000)]
+        self.boilerplate = ' '.join(self.vocabulary[:300])
+        self.nav_links = (['/', '/companies', '/locations', '/about']
+                          + [f"/jobs?page={i}" for i in range(1, min(self.listings, 16) + 1)]
+                          + [f"/company/{i}" for i in range(min(self.companies, 30))]
+                          + [f"/location/{i}" for i in range(min(self.locations, 10))])
+
+    def job_links(self, listing):
+        first = (listing - 1) * self.jobs_per_listing
+        return [f"/jobs/{i}" for i in range(first, min(first + self.jobs_per_listing, self.jobs))]
+
+    def render(self, path, query):
+        """(status, headers, body) for a request path"""
+        if path == '/':
+            links = ['/jobs?page=1', '/companies', '/locations', '/about', '/archive', '/downloads/feed']
+            return self.html_page("Home", links)
+        if path == '/archive':
+            # Oversized page: links up front, then padding past the body cap
+            status, headers, body = self.html_page("Archive", ['/jobs?page=1', '/about'])
+            return status, headers, body + b'<!--' + b'x' * self.archive_bytes + b'-->'
+        if path == '/static/app.js':
+            return self.bundle()
+        if path == '/downloads/feed':
+            # Large non-HTML response the crawler should not download
+            return 200, {'Content-Type': 'application/json'}, b'[' + b'0,' * (self.feed_bytes // 2) + b'0]'
+
+        if path == '/jobs':
+            page = int(query.get('page', ['1'])[0])
+            if not 1 <= page <= self.listings:
+                return 404, {}, b''
+            return self.listing_page(page)
+
+        if path.startswith('/jobs/'):
+            job = self.number(path)
+            if job is None or job >= self.jobs:
+                return 404, {}, b''
+            rng = random.Random(self.seed * 1000003 + job)
+            links = [f"/company/{rng.randrange(self.companies)}",
+                     f"/location/{rng.randrange(self.locations)}"]
+            if job < self.extras:
+                links += [f"/old-jobs/{job}", f"/expired/{job}", f"/slow/{job}", f"/busy/{job}"]
+            description = ' '.join(rng.sample(self.vocabulary[300:], 15))
+            return self.html_page(f"Job {job}", links, scripts=['/static/app.js?v=2'],
+                                  text=description, template=True)
+
+        if path == '/companies':
+            return self.html_page("Companies", [f"/company/{i}" for i in range(self.companies)])
+        if path == '/locations':
+            return self.html_page("Locations", [f"/location/{i}" for i in range(self.locations)])
+        if path.startswith('/company/') or path.startswith('/location/'):
+            number = self.number(path)
+            limit = self.companies if path.startswith('/company/') else self.locations
+            if number is None or number >= limit:
+                return 404, {}, b''
+            return self.html_page(path, ['/jobs?page=1'])
+        if path == '/about':
+            return self.html_page("About", ['/'])
+        if path.startswith('/careers/'):
+            number = self.number(path)
+            if number is None or number >= self.careers:
+                return 404, {}, b''
+            return self.html_page(f"Career {number}", ['/'])
+
+        if path.startswith('/old-jobs/'):
+            return 301, {'Location': f"/jobs/{self.number(path)}"}, b''
+        if path.startswith('/slow/'):
+            time.sleep(self.slow_ms / 1000)
+            return self.html_page("Slow", ['/'])
+        if path.startswith('/busy/'):
+            return self.html_page("Busy", ['/'])
+
+        if path == '/robots.txt':
+            # The locations sitemap is only listed here, not at a well-known path
+            body = (f"User-agent: *\nAllow: /\nSitemap: {self.base_url}/sitemap_index.xml\n"
+                    f"Sitemap: {self.base_url}/sitemaps/locations.xml\n").encode('utf-8')
+            return 200, {'Content-Type': 'text/plain'}, body
+        if path == '/sitemap_index.xml':
+            return self.sitemap_index(['/sitemaps/jobs.xml.gz', '/sitemaps/nested_index.xml'])
+        if path == '/sitemaps/nested_index.xml':
+            return self.sitemap_index(['/sitemaps/companies.xml'])
+        if path == '/sitemaps/jobs.xml.gz':
+            status, headers, body = self.urlset([f"/jobs/{i}" for i in range(0, self.jobs, 3)])
+            return status, {'Content-Type': 'application/gzip'}, gzip.compress(body)
+        if path == '/sitemaps/companies.xml':
+            return self.urlset([f"/company/{i}" for i in range(self.companies)])
+        if path == '/sitemaps/locations.xml':
+            return self.urlset([f"/location/{i}" for i in range(self.locations)])
+
+        return 404, {}, b''
+
+    def number(self, path):
+        try:
+            return int(path.rstrip('/').rsplit('/', 1)[1])
+        except (IndexError, ValueError):
+            return None
+
+    def html_page(self, title, links, scripts=(), text='', template=False):
+        anchors = ''.join(f'<li><a href="{link}">{link}</a></li>' for link in links)
+        tags = ''.join(f'<script src="{src}"></script>' for src in scripts)
+        content = f"<p>{text}</p><ul>{anchors}</ul>"
+        if template:
+            nav = ''.join(f'<a href="{link}">{link}</a>' for link in self.nav_links)
+            content = f"<nav>{nav}</nav>{content}<footer>{self.boilerplate}</footer>"
+        body = f"<!DOCTYPE html><html><head><title>{title}</title>{tags}</head><body>{content}</body></html>"
+        return 200, {'Content-Type': 'text/html; charset=utf-8'}, body.encode('utf-8')
+
+    def bundle(self):
+        """SPA bundle: a route table among minified code and UI strings"""
+        routes = ','.join(f'{{path:"/careers/{i}",component:c{i}}}' for i in range(self.careers))
+        noise = ';'.join(f'var a{i}="v{i}",m{i}="Select a location",r{i}="/jobs/:id"' for i in range(2000))
+        body = f'!function(){{{noise};var routes=[{routes}];}}();'
+        return 200, {'Content-Type': 'application/javascript'}, body.encode('utf-8')
+
+    def listing_page(self, page):
+        jobs = self.job_links(page)
+        cards = []
+        for index, link in enumerate(jobs):
+            # Mix the three link styles the extractor has to find
+            if index % 3 == 0:
+                cards.append(f'<div class="card"><a href="{link}?utm_source=list#apply">Job</a></div>')
+            elif index % 3 == 1:
+                cards.append(f'<div class="card" data-href="{link}"><span>Job</span></div>')
+            else:
+                cards.append(f'<div class="card"><span class="title">Job</span></div>'
+                             f'<script>window.routes.push({{path: "{link}"}});</script>')
+        nav = [f'<a href="/jobs?page={page}&sort=recent">Most recent</a>']  # same listing
+        if page < self.listings:
+            nav.append(f'<a href="/jobs?page={page + 1}">Next</a>')
+        if page > 1:
+            nav.append(f'<a href="/jobs?page={page - 1}">Previous</a>')
+        body = (
+            '<!DOCTYPE html><html><head><title>Jobs</title>'
+            '<link rel="stylesheet" href="/static/site.css"><script src="/static/app.js"></script>'
+            '</head><body><script>window.routes = [];</script>'
+            + ''.join(cards) + ''.join(nav) +
+            '<a href="/">Home</a><a href="mailto:jobs@example.com">Mail</a></body></html>'
+        )
+        return 200, {'Content-Type': 'text/html; charset=utf-8'}, body.encode('utf-8')
+
+    def sitemap_index(self, children):
+        entries = ''.join(f"<sitemap><loc>{self.base_url}{child}</loc></sitemap>" for child in children)
+        body = f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="{SITEMAP_NS}">{entries}</sitemapindex>'
+        return 200, {'Content-Type': 'application/xml'}, body.encode('utf-8')
+
+    def urlset(self, paths):
+        entries = ''.join(f"<url><loc>{self.base_url}{path}</loc><lastmod>2025-01-01</lastmod></url>" for path in paths)
+        body = f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="{SITEMAP_NS}">{entries}</urlset>'
+        return 200, {'Content-Type': 'application/xml'}, body.encode('utf-8')
+
+    def expected_urls(self):
+        """Live HTML pages a complete crawl should put in the sitemap"""
+        paths = ['/', '/jobs', '/companies', '/locations', '/about', '/archive']
+        paths += [f"/jobs?page={page}" for page in range(1, self.listings + 1)]
+        paths += [f"/jobs?page={page}&sort=recent" for page in range(1, self.listings + 1)]
+        paths += [f"/jobs/{i}" for i in range(self.jobs)]
+        paths += [f"/company/{i}" for i in range(self.companies)]
+        paths += [f"/location/{i}" for i in range(self.locations)]
+        paths += [f"/slow/{i}" for i in range(self.extras)]
+        paths += [f"/busy/{i}" for i in range(self.extras)]
+        paths += [f"/careers/{i}" for i in range(self.careers)]
+        return {self.base_url + path for path in paths}
+
+    def non_html_urls(self):
+        """Linked URLs that serve something other than HTML (the JSON feed)"""
+        return {self.base_url + '/downloads/feed'}
+
+    def dead_urls(self):
+        """Linked URLs that answer 404 or redirect elsewhere"""
+        paths = [f"/expired/{i}" for i in range(self.extras)]
+        paths += [f"/old-jobs/{i}" for i in range(self.extras)]
+        return {self.base_url + path for path in paths}
+
+
+def make_handler(site):
+    busy_hits = set()
+    lock = threading.Lock()
+
+    class SyntheticSiteHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+        def log_message(self, format, *args):
+            pass
+
+        def respond(self, send_body):
+            parsed = urlparse(self.path)
+            if parsed.path.startswith('/busy/'):
+                with lock:
+                    first_hit = parsed.path not in busy_hits
+                    busy_hits.add(parsed.path)
+                if first_hit:
+                    self.send_response(429)
+                    self.send_header('Retry-After', '1')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+            status, headers, body = site.render(parsed.path, parse_qs(parsed.query))
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            self.respond(send_body=True)
+
+        def do_HEAD(self):
+            self.respond(send_body=False)
+
+    return SyntheticSiteHandler
+
+
+class QuietHTTPServer(http.server.ThreadingHTTPServer):
+    """Threaded server that ignores clients hanging up mid-response"""
+    
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+def serve_site(site_options, port_pipe):
+    """Child-process entry point: serve the synthetic site until killed"""
+    site = SyntheticSite(**site_options)
+    server = QuietHTTPServer(('127.0.0.1', 0), make_handler(site))
+    site.base_url = f"http://127.0.0.1:{server.server_address[1]}"  # absolute <loc> values
+    port_pipe.send(server.server_address[1])
+    server.serve_forever()
+
+
+def run_crawl(site, base_url, args):
+    """Crawl the synthetic site end to end and measure it"""
+    settings = {
+        'base_urls': [base_url],
+        'delay': 0.0,
+        'max_urls': len(site.expected_urls()) * 2,
+        'crawl_mode': args.crawl_mode,
+        'concurrency': args.concurrency,
+        'per_host_concurrency': args.concurrency,
+        'parse_workers': 0,
+        'allowed_domains': ['127.0.0.1'],
+        'job_keywords': ['software', 'sales'],
+        'locations': ['pune', 'london'],
+        'retry_backoff': 0.5,
+        'dedupe': args.dedupe,
+        'seen_set': args.seen_set,
+    }
+    generator = EnhancedFinploySitemapGenerator(**settings)
+
+    start = time.perf_counter()
+    if args.workers > 1:
+        broker = SQLiteBroker('benchmark_broker.db')
+        try:
+            discovered_urls = generator.run_coordinator(broker, args.workers, 'url', [
+                distributed_worker_settings(settings, args.workers, partition)
+                for partition in range(args.workers)
+            ])
+        finally:
+            broker.close()
+    else:
+        discovered_urls = generator.generate_enhanced_sitemap()
+    crawl_seconds = time.perf_counter() - start
+    files = generator.create_sitemap_xml(discovered_urls)
+    generator.generate_report()
+
+    # Correctness: compare the published sitemap with the live pages
+    published = set()
+    for path in files:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            for _, element in ET.iterparse(f):
+                if element.tag == f"{{{SITEMAP_NS}}}loc":
+                    published.add(element.text)
+    expected = {generator.canonicalize(url) for url in site.expected_urls()}
+    dead = {generator.canonicalize(url) for url in site.dead_urls()}
+    non_html = {generator.canonicalize(url) for url in site.non_html_urls()}
+    performance = generator.metrics.to_dict()
+    stages = performance['stages']
+
+    return {
+        'crawl_seconds': round(crawl_seconds, 2),
+        'pages_crawled': len(generator.crawled_urls),
+        'pages_failed': len(generator.failed_urls),
+        'pages_per_sec': round(len(generator.crawled_urls) / crawl_seconds, 1),
+        'fetch_p50_ms': stages['fetch']['p50_ms'],
+        'fetch_p95_ms': stages['fetch']['p95_ms'],
+        'parse_p50_ms': stages['parse']['p50_ms'],
+        'parse_p95_ms': stages['parse']['p95_ms'],
+        'bytes_downloaded': performance['bytes_downloaded'],
+        'skipped_non_html': performance['events'].get('skipped_non_html', 0),
+        'truncated_bodies': performance['events'].get('truncated_body', 0),
+        'expected_urls': len(expected),
+        'published_urls': len(published),
+        'recall': round(len(expected & published) / max(1, len(expected)), 4),
+        'dead_urls': len(published & dead),
+        'non_html_urls': len(published & non_html),
+        'unexpected_urls': len(published - expected - dead - non_html),
+        'duplicate_pages': len(generator.duplicate_of),
+        'near_duplicate_pages': generator.duplicate_stats['near'],  # the site has none
+        'stage_seconds': {stage: summary['total_seconds'] for stage, summary in stages.items()},
+    }
+
+
+def measure_crawl(site_options, base_url, args, result_pipe):
+    """Child-process entry point: run_crawl plus the peak RSS of the crawl alone
+
+    peak_rss_mb is this process; peak_child_rss_mb is the largest of its
+    parse-pool or distributed worker processes. The server process and the
+    micro-benchmarks are not included.
+    """
+    site = SyntheticSite(base_url=base_url, **site_options)
+    try:
+        results = run_crawl(site, base_url, args)
+    except BaseException as e:
+        result_pipe.send(e)
+        raise
+    results['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    results['peak_child_rss_mb'] = round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    result_pipe.send(results)
+
+
+def run_micro(site, args):
+    """Extractor and sitemap-writer timings without the network"""
+    generator = EnhancedFinploySitemapGenerator(['https://www.finploy.com'])
+    html = site.listing_page(1)[2].decode('utf-8')
+    page_url = 'https://www.finploy.com/jobs?page=1'
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        fast_urls = generator.extract_urls_fast(page_url, html)
+    fast_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        soup_urls = generator.extract_urls_comprehensive(page_url, BeautifulSoup(html, 'html.parser'))
+    soup_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+    urls = [f"https://www.finploy.com/jobs/{i}" for i in range(args.sitemap_urls)]
+    start = time.perf_counter()
+    generator.create_sitemap_xml(urls, filename='micro_sitemap.xml')
+    sitemap_seconds = time.perf_counter() - start
+
+    return {
+        'extract_fast_ms_per_page': round(fast_ms, 3),
+        'extract_soup_ms_per_page': round(soup_ms, 3),
+        'extractors_agree': fast_urls == soup_urls,
+        'sitemap_write_sec': round(sitemap_seconds, 3),
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """List metrics that regressed by more than `tolerance` (a fraction)"""
+    regressions = []
+    for metric, better in TRACKED_METRICS.items():
+        if metric not in results or metric not in baseline or not baseline[metric]:
+            continue
+        change = (results[metric] - baseline[metric]) / baseline[metric]
+        if (better == 'higher' and change < -tolerance) or (better == 'lower' and change > tolerance):
+            regressions.append(f"{metric}: {baseline[metric]} -> {results[metric]} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    """Benchmark main execution"""
+    parser = argparse.ArgumentParser(description="Offline crawler benchmark against a synthetic site")
+    parser.add_argument('--pages', type=int, default=2000, help="job pages on the synthetic site")
+    parser.add_argument('--crawl-mode', choices=['sync', 'async'], default='async')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=1, help="crawl with N distributed worker processes")
+    parser.add_argument('--dedupe', choices=['off', 'exact', 'near'], default='exact',
+                        help="duplicate detection mode of the crawl")
+    parser.add_argument('--seen-set', choices=['exact', 'fingerprint', 'bloom'], default='exact',
+                        help="seen-set backend of the crawl")
+    parser.add_argument('--slow-ms', type=int, default=200, help="latency of the /slow/ pages")
+    parser.add_argument('--repeat', type=int, default=20, help="iterations of the extractor micro-benchmark")
+    parser.add_argument('--sitemap-urls', type=int, default=100000, help="URLs in the sitemap-writer micro-benchmark")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', default='benchmark_baseline.json')
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed regression before failing")
+    args = parser.parse_args()
+
+    site_options = {'pages': args.pages, 'slow_ms': args.slow_ms}
+    parent_pipe, child_pipe = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=serve_site, args=(site_options, child_pipe), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{parent_pipe.recv()}"
+    site = SyntheticSite(base_url=base_url, **site_options)
+
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline)
+    workdir = tempfile.mkdtemp(prefix='sitemap-bench-')
+    cwd = os.getcwd()
+    os.chdir(workdir)  # keep the generator's log, report and sitemap out of the repo
+    try:
+        print(f"🏁 Crawling synthetic site at {base_url} ({args.pages} job pages)")
+        result_pipe, child_result_pipe = multiprocessing.Pipe()
+        crawl = multiprocessing.Process(target=measure_crawl,
+                                        args=(site_options, base_url, args, child_result_pipe))
+        crawl.start()
+        child_result_pipe.close()  # recv() raises EOFError if the crawl process dies
+        results = result_pipe.recv()
+        crawl.join()
+        if isinstance(results, BaseException):
+            raise results
+        logging.getLogger().setLevel(logging.WARNING)
+        print("\n⏱️  Running micro-benchmarks")
+        results.update(run_micro(site, args))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+        server.terminate()
+
+    results['settings'] = {'pages': args.pages, 'crawl_mode': args.crawl_mode,
+                           'concurrency': args.concurrency, 'slow_ms': args.slow_ms,
+                           'workers': args.workers, 'dedupe': args.dedupe, 'seen_set': args.seen_set}
+
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print("\n" + "="*60)
+    for key, value in results.items():
+        if key not in ('settings', 'stage_seconds'):
+            print(f"   {key}: {value}")
+    print(f"\n💾 Results saved: {output}")
+
+    if args.save_baseline:
+        with open(baseline_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline saved: {baseline_path}")
+        return 0
+
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline.get('settings') != results['settings']:
+            print("⚠️  Baseline was recorded with different settings; comparison skipped")
+            return 0
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ Performance regressions (> {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"   {regression}")
+            return 1
+        print(f"\n✅ No regressions against {baseline_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,65 +6,2202 @@ Optimized to discover more URLs while maintaining speed
 
 import requests
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse, parse_qs, unquote
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qs, parse_qsl, urlencode, unquote
 import xml.etree.ElementTree as ET
 from datetime import datetime
 import time
 import logging
+import logging.handlers
+import atexit
 import json
 import re
-from collections import deque
+import io
+import os
+import codecs
+import gzip
+import queue
+import tempfile
+import math
+import itertools
+import heapq
+import random
+import asyncio
+import argparse
+import hashlib
+import socket
+import sqlite3
+import threading
+import multiprocessing
+import cProfile
+import pstats
+import http.server
+from bisect import bisect_left
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
+from xml.sax.saxutils import escape
+from array import array
+from collections import deque, Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
+
+# Words that make a quoted script string a likely link
+SCRIPT_LINK_KEYWORDS = r'(?:job|career|company|location|department)'
+
+# Single-pass scanner for URLs in JavaScript. Every string literal is
+# consumed whole, so quotes cannot pair up across literals; a literal is
+# captured when it follows a url:/href:/link:/path: key or contains a
+# link keyword, and otherwise skipped by the last two alternatives.
+SCRIPT_URL_PATTERN = re.compile(
+    r'\b(?:url|href|link|path):\s*(?:"(?P<key_double>/?[^"\']+)"|\'(?P<key_single>/?[^"\']+)\')'
+    r'|"(?P<double>(?:https?://)?[^"\\\n]*' + SCRIPT_LINK_KEYWORDS + r'[^"\\\n]*)"'
+    r"|'(?P<single>(?:https?://)?[^'\\\n]*" + SCRIPT_LINK_KEYWORDS + r"[^'\\\n]*)'"
+    r'|"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'',
+    re.IGNORECASE
+)
+
+# Routes accepted from external bundles: site paths or absolute URLs only,
+# without spaces or route parameters (/jobs/:id, /jobs/${id})
+BUNDLE_ROUTE_PATTERN = re.compile(r'(?:https?://[\w.-]+(?::\d+)?)?/(?!/)[\w\-./~%?=&+,;@]*\Z')
+
+# Script files worth mining for routes
+BUNDLE_EXTENSIONS = ('.js', '.mjs')
+
+# Attributes that may hold a link on any element
+LINK_ATTRIBUTES = ('href', 'data-href', 'data-url', 'data-link')
+
+# Site-wide template blocks left out of content fingerprints
+BOILERPLATE_TAGS = ('nav', 'header', 'footer', 'aside')
+
+
+def script_link_candidates(script_content):
+    """Raw link candidates from one script, in a single scan"""
+    candidates = []
+    for match in SCRIPT_URL_PATTERN.finditer(script_content):
+        group = match.lastgroup
+        if group is not None:
+            candidate = match.group(group)
+            if not candidate.startswith('//'):
+                candidates.append(candidate)
+    return candidates
+
+
+def bundle_route_candidates(script_content):
+    """Route-like link candidates from an external script bundle
+    
+    Bundles hold many strings that merely contain a keyword (labels,
+    messages), so only values shaped like a path or URL are kept.
+    """
+    return sorted({candidate for candidate in script_link_candidates(script_content)
+                   if BUNDLE_ROUTE_PATTERN.match(candidate)})
+
+
+def body_charset(content_type):
+    """Codec for a response body: the declared charset if Python knows it, else UTF-8"""
+    if 'charset=' in content_type.lower():
+        charset = content_type.lower().split('charset=', 1)[1].split(';')[0].strip().strip('"\'')
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            pass
+    return 'utf-8'
+
+
+def decode_body(content, content_type):
+    """Decode a response body using the declared charset (UTF-8 otherwise)"""
+    return content.decode(body_charset(content_type), errors='replace')
+
+
+def tokenize_page(html):
+    """Run the single-pass tokenizer over a page"""
+    tokenizer = LinkTokenizer()
+    tokenizer.feed(html)
+    tokenizer.close()
+    return tokenizer
+
+
+def resolve_link_candidates(url, tokenizer):
+    """Absolute URLs of every link a tokenized page holds (not yet validated)
+    
+    Raw candidates are deduplicated before urljoin, so repeated links on
+    listing pages are only resolved once.
+    """
+    candidates = set(tokenizer.links)
+    for script_content in tokenizer.scripts:
+        candidates.update(script_link_candidates(script_content))
+    
+    return {urljoin(url, href).split('#')[0] for href in candidates}
+
+
+def extract_link_candidates(url, html, timings=None):
+    """Absolute URLs of every link on a page (not yet validated)
+    
+    If a `timings` dict is given, the seconds spent tokenizing ('parse')
+    and scanning scripts and resolving links ('extract') are stored in it.
+    """
+    start = time.perf_counter()
+    tokenizer = tokenize_page(html)
+    parsed_at = time.perf_counter()
+    links = resolve_link_candidates(url, tokenizer)
+    if timings is not None:
+        timings['parse'] = parsed_at - start
+        timings['extract'] = time.perf_counter() - parsed_at
+    return links
+
+
+def parse_page_worker(url, content, content_type, with_fingerprint=True):
+    """Parse-pool entry point
+    
+    Raw response bytes in; (candidate URLs, content fingerprint or None,
+    rel=canonical href, external script srcs, stage timings) out.
+    """
+    start = time.perf_counter()
+    html = decode_body(content, content_type)
+    decoded_at = time.perf_counter()
+    tokenizer = tokenize_page(html)
+    parsed_at = time.perf_counter()
+    fingerprint = tokenizer.fingerprint() if with_fingerprint else None
+    fingerprinted_at = time.perf_counter()
+    links = resolve_link_candidates(url, tokenizer)
+    timings = {
+        'decode': decoded_at - start,
+        'parse': parsed_at - decoded_at,
+        'fingerprint': fingerprinted_at - parsed_at,
+        'extract': time.perf_counter() - fingerprinted_at,
+    }
+    return links, fingerprint, tokenizer.canonical, tokenizer.script_sources, timings
+
+
+class LinkTokenizer(HTMLParser):
+    """Single-pass HTML tokenizer collecting links, inline scripts and text
+    
+    Collects raw values of LINK_ATTRIBUTES from every tag (deduplicated as
+    they are seen), the text of every inline <script> and the src of every
+    external one, the visible text and links outside BOILERPLATE_TAGS used
+    for content fingerprints and the <link rel="canonical"> href, all in
+    one scan.
+    """
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = set()
+        self.content_links = set()  # links outside boilerplate blocks
+        self.scripts = []
+        self.script_sources = []
+        self.script_text = None
+        self.text = []
+        self.in_style = False
+        self.boilerplate_depth = 0
+        self.canonical = None
+    
+    def handle_starttag(self, tag, attrs):
+        self.handle_startendtag(tag, attrs)
+        if tag == 'script':
+            self.script_text = []
+        elif tag == 'style':
+            self.in_style = True
+        elif tag in BOILERPLATE_TAGS:
+            self.boilerplate_depth += 1
+    
+    def handle_startendtag(self, tag, attrs):
+        for name, value in attrs:
+            if value and name in LINK_ATTRIBUTES:
+                value = value.strip()
+                if value:
+                    self.links.add(value)
+                    if not self.boilerplate_depth:
+                        self.content_links.add(value)
+        if tag == 'script':
+            for name, value in attrs:
+                if name == 'src' and value and value.strip():
+                    self.script_sources.append(value.strip())
+        elif tag == 'link' and self.canonical is None:
+            attributes = dict(attrs)
+            if 'canonical' in (attributes.get('rel') or '').lower().split() and attributes.get('href'):
+                self.canonical = attributes['href'].strip()
+    
+    def handle_data(self, data):
+        if self.script_text is not None:
+            self.script_text.append(data)
+        elif not self.in_style and not self.boilerplate_depth:
+            self.text.append(data)
+    
+    def handle_endtag(self, tag):
+        if tag == 'script' and self.script_text is not None:
+            script_content = ''.join(self.script_text)
+            if script_content:
+                self.scripts.append(script_content)
+            self.script_text = None
+        elif tag == 'style':
+            self.in_style = False
+        elif tag in BOILERPLATE_TAGS and self.boilerplate_depth:
+            self.boilerplate_depth -= 1
+    
+    def fingerprint(self):
+        """SimHash of the page's content text and links (None if too little content)"""
+        return page_fingerprint(' '.join(self.text), self.content_links)
+
+
+# Words of visible text used as content-fingerprint features
+WORD_PATTERN = re.compile(r'\w+')
+
+# Pages with fewer distinct features are too small for reliable SimHash matching
+MIN_FINGERPRINT_FEATURES = 16
+
+# Byte value -> its 8 bits spread into 32-bit lanes, for summing bit counts
+SIMHASH_SPREAD = [sum(1 << (32 * bit) for bit in range(8) if value >> bit & 1)
+                  for value in range(256)]
+
+
+def simhash(features):
+    """64-bit SimHash of a set of string features
+    
+    Bit i is set when most features' hashes have bit i set. Per-bit
+    counts are summed eight lanes at a time from a byte lookup table, so
+    the only per-feature Python work is one blake2b call.
+    """
+    digests = b''.join(hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                       for feature in features)
+    half = len(features) / 2
+    fingerprint = 0
+    for position in range(8):
+        lanes = sum(SIMHASH_SPREAD[value] * count
+                    for value, count in Counter(digests[position::8]).items())
+        for bit in range(8):
+            if (lanes >> (32 * bit)) & 0xFFFFFFFF > half:
+                fingerprint |= 1 << (position * 8 + bit)
+    return fingerprint
+
+
+def page_fingerprint(text, links):
+    """SimHash over the words of a page's content text and its raw links"""
+    features = set(WORD_PATTERN.findall(text.lower()))
+    features.update('\x00' + link for link in links)  # keep links apart from words
+    if len(features) < MIN_FINGERPRINT_FEATURES:
+        return None
+    return simhash(features)
+
+
+def soup_fingerprint(soup):
+    """page_fingerprint of a BeautifulSoup page, skipping boilerplate, script and style"""
+    def in_content(element):
+        return not any(parent.name in BOILERPLATE_TAGS for parent in element.parents)
+    text = ' '.join(string for string in soup.find_all(string=True)
+                    if string.parent.name not in ('script', 'style') and in_content(string))
+    links = [tag['href'] for tag in soup.find_all(href=True) if in_content(tag)]
+    return page_fingerprint(text, links)
+
+
+class DuplicateIndex:
+    """Exact (body hash) and near-duplicate (SimHash) lookup of crawled pages
+    
+    Near-duplicate candidates are found through four 16-bit bands of the
+    fingerprint: two fingerprints at most 3 bits apart share at least one
+    band exactly, so a lookup compares against the few pages in matching
+    bands instead of every page seen.
+    """
+    
+    BANDS = 4
+    
+    def __init__(self, max_distance=3):
+        self.max_distance = min(max_distance, self.BANDS - 1)
+        self.exact = {}  # first 64 bits of the body hash -> URL
+        self.bands = [{} for _ in range(self.BANDS)]  # band value -> [(fingerprint, URL)]
+    
+    def find_exact(self, body_hash):
+        return self.exact.get(int(body_hash[:16], 16))
+    
+    def find_near(self, fingerprint):
+        if fingerprint is None:
+            return None
+        for band, table in enumerate(self.bands):
+            for other, url in table.get((fingerprint >> (16 * band)) & 0xFFFF, ()):
+                if bin(fingerprint ^ other).count('1') <= self.max_distance:
+                    return url
+        return None
+    
+    def add(self, url, body_hash, fingerprint=None):
+        self.exact.setdefault(int(body_hash[:16], 16), url)
+        if fingerprint is not None:
+            entry = (fingerprint, url)
+            for band, table in enumerate(self.bands):
+                table.setdefault((fingerprint >> (16 * band)) & 0xFFFF, []).append(entry)
+
+
+# Query parameters that only track campaigns and never change page content
+TRACKING_PARAMS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+                   'gclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga')
+
+# (path regex, replacement) aliases applied after normalization
+DEFAULT_ALIAS_RULES = [
+    (r'/index\.(?:php|html?)$', '/'),  # /index.php is the home page
+    (r'(?<=.)/+$', ''),                # /jobs/ and /jobs are the same page
+]
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def compile_alias_rules(alias_rules):
+    return [(re.compile(pattern), replacement) for pattern, replacement in alias_rules]
+
+
+def canonicalize_url(url, alias_rules=(), tracking_params=TRACKING_PARAMS):
+    """Canonical form of a URL used for deduplication
+    
+    Lowercases scheme and host, drops default ports and the fragment,
+    strips tracking parameters, sorts the query string and applies
+    compiled (pattern, replacement) path aliases.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, DEFAULT_PORTS.get(scheme)) else f"{host}:{port}"
+    
+    path = parsed.path or '/'
+    for pattern, replacement in alias_rules:
+        path = pattern.sub(replacement, path)
+    
+    query = ''
+    if parsed.query:
+        params = [(key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+                  if key.lower() not in tracking_params]
+        query = urlencode(sorted(params))
+    
+    return urlunparse((scheme, netloc, path or '/', parsed.params, query, ''))
+
+
+def clean_url(url, tracking_params=TRACKING_PARAMS):
+    """Form of a linked URL that is fetched and published
+    
+    Only the fragment and tracking parameters are dropped; path, query
+    order and encoding stay as the site wrote them, since the server may
+    redirect any other spelling (canonicalize_url is only a seen-set key).
+    """
+    url = url.strip().split('#', 1)[0]
+    base, sep, query = url.partition('?')
+    if not sep:
+        return url
+    params = [param for param in query.split('&')
+              if param and unquote(param.split('=', 1)[0]).lower() not in tracking_params]
+    return f"{base}?{'&'.join(params)}" if params else base
+
+
+def url_fingerprint(url):
+    """64-bit fingerprint of a URL (never 0, which marks empty slots)"""
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+
+
+class URLSeenSet:
+    """Compact, set-like store of seen URLs
+    
+    mode='fingerprint' keeps 64-bit fingerprints in an open-addressing
+    array table (~16 bytes per URL, collisions negligible below billions
+    of URLs); mode='bloom' uses a Bloom filter sized for `expected_items`
+    at `error_rate` (a few bytes per URL, rare false "seen" answers).
+    With keep_urls=True the URL strings are also spooled to a temp file so
+    the set can still be iterated, e.g. to write the sitemap.
+    """
+    
+    def __init__(self, mode='fingerprint', keep_urls=False, expected_items=1000000, error_rate=0.001):
+        self.mode = mode
+        self.count = 0
+        if mode == 'bloom':
+            self.num_bits = max(64, int(-expected_items * math.log(error_rate) / (math.log(2) ** 2)))
+            self.num_hashes = max(1, round(self.num_bits / expected_items * math.log(2)))
+            self.bits = bytearray((self.num_bits + 7) // 8)
+        else:
+            self.table = array('Q', bytes(8 * 1024))
+        self.spool = tempfile.TemporaryFile('w+', encoding='utf-8') if keep_urls else None
+    
+    def bloom_positions(self, fp):
+        # Double hashing: derive k bit positions from one 64-bit fingerprint
+        h1, h2 = fp & 0xFFFFFFFF, (fp >> 32) | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+    
+    def find_slot(self, table, fp):
+        mask = len(table) - 1
+        i = fp & mask
+        while True:
+            value = table[i]
+            if value == 0 or value == fp:
+                return i
+            i = (i + 1) & mask
+    
+    def grow(self):
+        old = self.table
+        self.table = array('Q', bytes(16 * len(old)))
+        for fp in old:
+            if fp:
+                self.table[self.find_slot(self.table, fp)] = fp
+    
+    def add(self, url):
+        """Add a URL; returns True if it was not seen before"""
+        fp = url_fingerprint(url)
+        if self.mode == 'bloom':
+            positions = self.bloom_positions(fp)
+            if all(self.bits[p >> 3] & (1 << (p & 7)) for p in positions):
+                return False
+            for p in positions:
+                self.bits[p >> 3] |= 1 << (p & 7)
+        else:
+            slot = self.find_slot(self.table, fp)
+            if self.table[slot]:
+                return False
+            self.table[slot] = fp
+            if (self.count + 1) * 10 > len(self.table) * 6:
+                self.grow()
+        self.count += 1
+        if self.spool:
+            self.spool.write(url + '\n')
+        return True
+    
+    def __contains__(self, url):
+        fp = url_fingerprint(url)
+        if self.mode == 'bloom':
+            return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self.bloom_positions(fp))
+        return self.table[self.find_slot(self.table, fp)] != 0
+    
+    def __len__(self):
+        return self.count
+    
+    def __iter__(self):
+        if self.spool is None:
+            raise TypeError("URLSeenSet was created without keep_urls and cannot be iterated")
+        self.spool.flush()
+        self.spool.seek(0)
+        for line in self.spool:
+            yield line.rstrip('\n')
+        self.spool.seek(0, os.SEEK_END)
+
+
+class URLTable:
+    """Dict-like URL -> text map kept in a temporary SQLite file
+    
+    Per-URL values (published locations, lastmod dates) stored here stay
+    on disk rather than growing in memory with the crawl; used alongside
+    the compact seen-sets. Supports the dict operations the generator uses.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        # An empty filename opens a private on-disk database deleted on close
+        self.conn = sqlite3.connect('', check_same_thread=False)
+        self.conn.execute('CREATE TABLE entries (url TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID')
+    
+    def get(self, url, default=None):
+        with self.lock:
+            row = self.conn.execute('SELECT value FROM entries WHERE url = ?', (url,)).fetchone()
+        return row[0] if row else default
+    
+    def __getitem__(self, url):
+        value = self.get(url)
+        if value is None:
+            raise KeyError(url)
+        return value
+    
+    def __setitem__(self, url, value):
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?)', (url, value))
+    
+    def pop(self, url, default=None):
+        with self.lock:
+            row = self.conn.execute('DELETE FROM entries WHERE url = ? RETURNING value', (url,)).fetchone()
+        return row[0] if row else default
+    
+    def __contains__(self, url):
+        return self.get(url) is not None
+    
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+
+# Default URL filter configuration
+ALLOWED_DOMAINS = ['finploy.com', 'finploy.co.uk']
+SKIP_EXTENSIONS = ['.pdf', '.jpg', '.jpeg', '.png', '.gif', '.css', '.js',
+                   '.ico', '.xml', '.txt', '.zip', '.doc', '.docx']
+DENY_TOKENS = ['wp-admin', 'wp-content', 'admin', 'login', 'register']
+
+
+class URLFilter:
+    """Compiled URL filter built once from config
+    
+    Hosts must equal an allowed domain or be a subdomain of one, file
+    extensions are looked up on the parsed path, and all deny tokens are
+    matched by a single compiled regex. check() returns the reason a URL
+    is rejected (None if it passes) and rejection counts are kept per rule.
+    """
+    
+    def __init__(self, allowed_domains=ALLOWED_DOMAINS, skip_extensions=SKIP_EXTENSIONS,
+                 deny_tokens=DENY_TOKENS, max_length=300):
+        self.allowed_domains = frozenset(domain.lower().lstrip('.') for domain in allowed_domains)
+        self.skip_extensions = frozenset(ext.lower() for ext in skip_extensions)
+        self.max_length = max_length
+        # Longest tokens first so the reported rule is the most specific one
+        tokens = sorted({token.lower() for token in deny_tokens}, key=len, reverse=True)
+        self.deny_pattern = re.compile('|'.join(map(re.escape, tokens))) if tokens else None
+        self.rejections = Counter()
+    
+    def host_allowed(self, host):
+        if host in self.allowed_domains:
+            return True
+        # Walk parent domains: jobs.www.finploy.com -> www.finploy.com -> finploy.com
+        dot = host.find('.')
+        while dot != -1:
+            host = host[dot + 1:]
+            if host in self.allowed_domains:
+                return True
+            dot = host.find('.')
+        return False
+    
+    def reason(self, url):
+        """Why a URL is rejected, or None if it is allowed"""
+        # Split scheme/host/path by hand: this runs on every extracted link
+        # and is several times cheaper than urlparse
+        scheme, sep, rest = url.partition('://')
+        if not sep or scheme.lower() not in ('http', 'https'):
+            return 'scheme'
+        end = len(rest)
+        for delimiter in '/?#':
+            index = rest.find(delimiter)
+            if index != -1 and index < end:
+                end = index
+        host = rest[:end].rpartition('@')[2].lower()
+        if host.startswith('['):
+            return 'domain'
+        host = host.partition(':')[0]
+        if not host or not self.host_allowed(host):
+            return 'domain'
+        
+        path = rest[end:]
+        for delimiter in '?#':
+            path = path.partition(delimiter)[0]
+        path = path.lower()
+        dot = path.rfind('.')
+        if dot > path.rfind('/') and path[dot:] in self.skip_extensions:
+            return f"extension:{path[dot:]}"
+        
+        if len(url) > self.max_length:
+            return 'too_long'
+        
+        if self.deny_pattern:
+            match = self.deny_pattern.search(url.lower())
+            if match:
+                return f"deny:{match.group(0)}"
+        return None
+    
+    def check(self, url):
+        """Like reason(), but also counts the rejection"""
+        reason = self.reason(url)
+        if reason:
+            self.rejections[reason] += 1
+        return reason
+
+
+# Common job-related terms for URL generation
+JOB_KEYWORDS = [
+    'software', 'developer', 'engineer', 'manager', 'analyst', 'consultant',
+    'sales', 'marketing', 'finance', 'hr', 'admin', 'support', 'designer',
+    'data', 'product', 'project', 'business', 'customer', 'technical'
+]
+
+# Common locations
+LOCATIONS = [
+    'mumbai', 'delhi', 'bangalore', 'hyderabad', 'chennai', 'pune',
+    'kolkata', 'ahmedabad', 'jaipur', 'lucknow', 'kanpur', 'nagpur',
+    'indore', 'bhopal', 'visakhapatnam', 'patna', 'vadodara', 'ghaziabad',
+    'london', 'manchester', 'birmingham', 'leeds', 'glasgow', 'liverpool',
+    'bristol', 'sheffield', 'edinburgh', 'leicester'
+]
+
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Per-page events that are sampled (1 in N kept) in the logs
+SAMPLED_EVENTS = ('fetch', 'page')
+
+# Handlers and listener installed by configure_logging
+_logging = {}
+
+
+class SampleFilter(logging.Filter):
+    """Keep 1 in `rate` records of each sampled event; others always pass"""
+    
+    def __init__(self, events, rate):
+        super().__init__()
+        self.rate = max(1, int(rate))
+        self.counters = {event: itertools.count() for event in events}
+    
+    def filter(self, record):
+        counter = self.counters.get(getattr(record, 'event', None))
+        return counter is None or next(counter) % self.rate == 0
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """One JSON object per record: time, level, event, message and its fields"""
+    
+    def format(self, record):
+        data = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'event': getattr(record, 'event', 'log'),
+            'message': record.getMessage(),
+        }
+        data.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler for an in-process listener: records are queued as-is,
+    so message formatting happens on the writer thread, not the caller's"""
+    
+    def prepare(self, record):
+        return record
+
+
+def configure_logging(log_file='enhanced_sitemap.log', event_log=None, level='INFO',
+                      sample=10, console=True):
+    """Send log records to a background writer thread (safe to call again)
+    
+    Loggers only put records on a queue; a QueueListener thread formats
+    and writes them, so the crawl never waits on file or console I/O. The
+    per-page "Crawling:" / "Found N URLs" lines are sampled (1 in `sample`
+    kept). With `event_log`, records are also written there as JSON lines,
+    together with one 'crawl' record per URL. Calling this again replaces
+    the handlers it installed rather than adding more.
+    """
+    root = logging.getLogger()
+    events = logging.getLogger(__name__).getChild('events')
+    stop_logging()
+    
+    def text_only(record):
+        return record.name != events.name
+    
+    handlers = []
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handler.addFilter(text_only)
+    if event_log:
+        handler = logging.FileHandler(event_log)
+        handler.setFormatter(JSONLinesFormatter())
+        handlers.append(handler)
+    
+    queue_handler = LocalQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(SampleFilter(SAMPLED_EVENTS, sample))
+    listener = logging.handlers.QueueListener(queue_handler.queue, *handlers,
+                                              respect_handler_level=True)
+    listener.start()
+    
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+    events.setLevel(logging.INFO if event_log else logging.CRITICAL + 1)
+    events.propagate = False
+    events.addHandler(queue_handler)
+    _logging.update(handler=queue_handler, handlers=handlers, listener=listener,
+                    options={'log_file': log_file, 'event_log': event_log, 'level': level,
+                             'sample': sample, 'console': console})
+
+
+def stop_logging():
+    """Flush and remove the handlers installed by configure_logging"""
+    if not _logging:
+        return
+    _logging['listener'].stop()
+    logging.getLogger().removeHandler(_logging['handler'])
+    logging.getLogger(__name__).getChild('events').removeHandler(_logging['handler'])
+    for handler in _logging['handlers']:
+        handler.close()
+    _logging.clear()
+
+
+atexit.register(stop_logging)
+
+
+def logging_options():
+    """Options of the current configure_logging setup, or None"""
+    return dict(_logging['options']) if _logging else None
+
+
+def load_config(path):
+    """Load generator settings (constructor keyword arguments) from a JSON file"""
+    with open(path) as f:
+        return json.load(f)
+
+
+# Statuses worth retrying later rather than recording as failures
+TRANSIENT_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostThrottle:
+    """Adaptive (AIMD) request rate for one host
+    
+    Fast, successful responses additively raise the in-flight limit and
+    shorten the delay between request starts by `step` seconds; 429/503
+    responses, timeouts and slow responses halve the limit and double the
+    delay, at most once per `target_latency` window (responses to requests
+    already in flight report the same congestion). Retry-After pauses the
+    host, and robots.txt Crawl-delay sets a floor on the delay. Safe to
+    share between the event loop and fetch threads.
+    """
+    
+    def __init__(self, max_concurrency, min_delay, max_delay=30.0, target_latency=2.0, step=0.1):
+        self.max_concurrency = max_concurrency
+        self.limit = max(1.0, max_concurrency / 2)
+        self.min_delay = min_delay
+        self.delay = min_delay
+        self.max_delay = max_delay
+        self.target_latency = target_latency
+        self.step = step
+        self.next_start = 0.0
+        self.paused_until = 0.0
+        self.backed_off_until = 0.0
+        self.lock = threading.Lock()
+    
+    @property
+    def concurrency(self):
+        return max(1, int(self.limit))
+    
+    def reserve_start(self, now):
+        """Claim the next request start time for this host"""
+        with self.lock:
+            start_at = max(now, self.next_start, self.paused_until)
+            self.next_start = start_at + self.delay
+        return start_at
+    
+    def on_success(self, latency):
+        if latency > self.target_latency:
+            self.back_off()
+            return
+        with self.lock:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self.delay = max(self.min_delay, self.delay - self.step)
+    
+    def back_off(self, retry_after=None):
+        with self.lock:
+            now = time.monotonic()
+            if now >= self.backed_off_until:
+                self.limit = max(1.0, self.limit / 2)
+                self.delay = min(self.max_delay, max(self.delay * 2, self.min_delay, 0.25))
+                self.backed_off_until = now + max(self.delay, self.target_latency)
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+    
+    def set_crawl_delay(self, crawl_delay):
+        with self.lock:
+            self.min_delay = max(self.min_delay, crawl_delay)
+            self.delay = max(self.delay, self.min_delay)
+
+
+class SharedHostThrottle(HostThrottle):
+    """HostThrottle whose request schedule is shared through a SQLiteBroker
+    
+    Distributed workers that crawl the same host claim start times from
+    one schedule in the broker, spaced by the claiming worker's delay, and
+    a Retry-After pause stops all of them; together they keep to the rate
+    (and robots.txt Crawl-delay) a single crawler would. Concurrency and
+    delay still adapt per worker.
+    """
+    
+    def __init__(self, broker, host, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.broker = broker
+        self.host = host
+    
+    def reserve_start(self, now):
+        with self.lock:
+            delay = self.delay
+        return now + self.broker.reserve_host(self.host, delay)
+    
+    def back_off(self, retry_after=None):
+        super().back_off(retry_after)
+        if retry_after:
+            self.broker.pause_host(self.host, retry_after)
+
+
+class FIFOFrontier:
+    """First-in, first-out crawl frontier (scores are ignored)"""
+    
+    def __init__(self):
+        self.queue = deque()
+    
+    def push(self, url, score=0.0):
+        self.queue.append(url)
+    
+    def pop(self):
+        return self.queue.popleft()
+    
+    def pop_scored(self):
+        return self.queue.popleft(), 0.0
+    
+    def __len__(self):
+        return len(self.queue)
+
+
+class PriorityFrontier:
+    """Heap-backed crawl frontier: lowest score is crawled first
+    
+    push/pop are O(log n); ties keep discovery order. Scores are fixed at
+    push time.
+    """
+    
+    def __init__(self):
+        self.heap = []
+        self.sequence = itertools.count()
+    
+    def push(self, url, score=0.0):
+        heapq.heappush(self.heap, (score, next(self.sequence), url))
+    
+    def pop(self):
+        return heapq.heappop(self.heap)[2]
+    
+    def pop_scored(self):
+        """Pop the best URL along with its score"""
+        score, _, url = heapq.heappop(self.heap)
+        return url, score
+    
+    def __len__(self):
+        return len(self.heap)
+
+
+def url_pattern(url):
+    """Coarse URL pattern used to track how productive a section is
+    
+    Digits become '#', a trailing '-word' of the first path segment
+    becomes '-*' and deeper segments become '*', so /jobs-in-pune and
+    /jobs-in-delhi share 'host/jobs-in-*' and /job/123/x is 'host/job/*/*'.
+    """
+    parsed = urlparse(url)
+    segments = [segment for segment in parsed.path.split('/') if segment]
+    if not segments:
+        return parsed.netloc + '/'
+    first = re.sub(r'\d+', '#', segments[0].lower())
+    if '-' in first:
+        first = first.rsplit('-', 1)[0] + '-*'
+    return parsed.netloc + '/' + '/'.join([first] + ['*'] * (len(segments) - 1))
+
+
+class ValidatorCache:
+    """On-disk HTTP validator cache for incremental recrawls
+    
+    Stores ETag, Last-Modified, body hash and extracted outlinks per URL so
+    later runs can send conditional requests and skip parsing unchanged pages.
+    Pages found to be duplicates are stored with the page they copy and no
+    outlinks.
+    """
+    
+    def __init__(self, path, commit_every=200):
+        self.path = path
+        self.commit_every = commit_every
+        self.pending_writes = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            ' url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,'
+            ' body_hash TEXT, outlinks TEXT, changed_at TEXT, duplicate_of TEXT)'
+        )
+        if 'duplicate_of' not in {row[1] for row in self.conn.execute('PRAGMA table_info(pages)')}:
+            # Cache written before duplicates were marked
+            self.conn.execute('ALTER TABLE pages ADD COLUMN duplicate_of TEXT')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS probe_misses ('
+            ' url TEXT PRIMARY KEY, status INTEGER, checked_at REAL)'
+        )
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS bundle_routes ('
+            ' body_hash TEXT PRIMARY KEY, routes TEXT, scanned_at TEXT)'
+        )
+    
+    def bundle_routes(self, body_hash):
+        """Route candidates scanned from a script bundle with this content hash, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT routes FROM bundle_routes WHERE body_hash = ?', (body_hash,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def put_bundle_routes(self, body_hash, routes):
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO bundle_routes VALUES (?, ?, ?)',
+                              (body_hash, json.dumps(routes), datetime.now().strftime('%Y-%m-%d')))
+            self.pending_writes += 1
+            if self.pending_writes >= self.commit_every:
+                self.conn.commit()
+                self.pending_writes = 0
+    
+    def recent_miss(self, url, max_age):
+        """Whether a probe of this URL returned 404/410 within max_age seconds"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT checked_at FROM probe_misses WHERE url = ?', (url,)
+            ).fetchone()
+        return row is not None and time.time() - row[0] < max_age
+    
+    def record_probe(self, url, status):
+        """Remember a missing URL (404/410), or forget it once it exists"""
+        with self.lock:
+            if status in (404, 410):
+                self.conn.execute('INSERT OR REPLACE INTO probe_misses VALUES (?, ?, ?)',
+                                  (url, status, time.time()))
+            else:
+                self.conn.execute('DELETE FROM probe_misses WHERE url = ?', (url,))
+            self.pending_writes += 1
+            if self.pending_writes >= self.commit_every:
+                self.conn.commit()
+                self.pending_writes = 0
+    
+    def get(self, url):
+        """Return the cached entry for a URL, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT etag, last_modified, body_hash, outlinks, changed_at, duplicate_of'
+                ' FROM pages WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'etag': row[0],
+            'last_modified': row[1],
+            'body_hash': row[2],
+            'outlinks': json.loads(row[3]),
+            'changed_at': row[4],
+            'duplicate_of': row[5],
+        }
+    
+    def put(self, url, etag, last_modified, body_hash, outlinks, changed_at, duplicate_of=None):
+        """Store validators and outlinks for a URL"""
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, etag, last_modified, body_hash, json.dumps(sorted(outlinks)), changed_at,
+                 duplicate_of)
+            )
+            self.pending_writes += 1
+            if self.pending_writes >= self.commit_every:
+                self.conn.commit()
+                self.pending_writes = 0
+    
+    def flush(self):
+        """Commit pending writes to disk"""
+        with self.lock:
+            self.conn.commit()
+            self.pending_writes = 0
+    
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+class CrawlStateStore:
+    """Disk-backed crawl frontier with batched checkpoints
+    
+    Every discovery and crawl outcome is journaled in memory and written to
+    SQLite in one transaction per batch, so the per-URL cost stays bounded
+    and a crash loses at most one batch of progress.
+    """
+    
+    QUEUED, CRAWLED, FAILED = 0, 1, 2
+    
+    def __init__(self, path, checkpoint_every=500):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.journal = []
+        # Used by one thread at a time, though not always the one that opened it
+        # (multi-site runs seed on a worker thread, then crawl on the event loop)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS urls ('
+            ' url TEXT PRIMARY KEY, state INTEGER NOT NULL, lastmod TEXT, location TEXT)'
+        )
+        if 'location' not in {row[1] for row in self.conn.execute('PRAGMA table_info(urls)')}:
+            # State written before pages were fetched as linked
+            self.conn.execute('ALTER TABLE urls ADD COLUMN location TEXT')
+    
+    def record(self, url, state, lastmod=None, location=None):
+        """Journal a state change; written out at the next checkpoint
+        
+        `location` is the URL fetched and published for the canonical
+        `url`, when they differ.
+        """
+        self.journal.append((url, state, lastmod, location))
+        if len(self.journal) >= self.checkpoint_every:
+            self.checkpoint()
+    
+    def checkpoint(self):
+        """Write journaled state changes to disk"""
+        if not self.journal:
+            return
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO urls (url, state, lastmod, location) VALUES (?, ?, ?, ?)'
+                ' ON CONFLICT(url) DO UPDATE SET state = excluded.state,'
+                ' lastmod = COALESCE(excluded.lastmod, urls.lastmod),'
+                ' location = COALESCE(excluded.location, urls.location)',
+                self.journal
+            )
+        self.journal = []
+    
+    def reset(self):
+        """Forget any previous crawl"""
+        self.journal = []
+        with self.conn:
+            self.conn.execute('DELETE FROM urls')
+    
+    def load(self):
+        """Yield (url, state, lastmod, location) in discovery order"""
+        self.checkpoint()
+        yield from self.conn.execute('SELECT url, state, lastmod, location FROM urls ORDER BY rowid')
+    
+    def close(self):
+        self.checkpoint()
+        self.conn.close()
+
+
+def partition_of(url, partitions, partition_by='url'):
+    """Partition (0..partitions-1) owning a canonical URL, by URL or host hash"""
+    key = urlparse(url).netloc if partition_by == 'host' else url
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % partitions
+
+
+class SQLiteBroker:
+    """Shared link queue and result store for a distributed crawl
+    
+    A local stand-in for a networked queue: the coordinator and every
+    worker open the same SQLite file (WAL mode), so several processes on
+    one machine can crawl together. Links are batched per transaction;
+    each worker consumes and deletes its own partition's rows, and
+    publishes its partial results when the crawl ends. Per-host request
+    schedules (see SharedHostThrottle) and heartbeats go through a second
+    connection that fetch threads may use too.
+    """
+    
+    HEARTBEAT_INTERVAL = 10  # seconds between heartbeats of a waiting worker
+    
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS links ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT, partition INTEGER NOT NULL,'
+            ' url TEXT NOT NULL, depth INTEGER, lastmod TEXT, priority REAL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS links_partition ON links (partition, id)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS workers ('
+            ' partition INTEGER PRIMARY KEY, idle INTEGER NOT NULL, crawled INTEGER,'
+            ' discovered INTEGER, heartbeat REAL, summary TEXT)'
+        )
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            ' url TEXT PRIMARY KEY, partition INTEGER, state INTEGER, lastmod TEXT, duplicate_of TEXT,'
+            ' location TEXT)'
+        )
+        if 'location' not in {row[1] for row in self.conn.execute('PRAGMA table_info(pages)')}:
+            self.conn.execute('ALTER TABLE pages ADD COLUMN location TEXT')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS control (key TEXT PRIMARY KEY, value TEXT)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS hosts (host TEXT PRIMARY KEY, next_start REAL, paused_until REAL)')
+        self.conn.commit()
+        self.shared_conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.shared_lock = threading.Lock()
+    
+    def reset(self, partitions):
+        """Start a new crawl with `partitions` workers, all busy until they report idle"""
+        with self.conn:
+            for table in ('links', 'workers', 'pages', 'control', 'hosts'):
+                self.conn.execute(f'DELETE FROM {table}')
+            self.conn.executemany(
+                'INSERT INTO workers (partition, idle, crawled, discovered, heartbeat) VALUES (?, 0, 0, 0, ?)',
+                [(partition, time.time()) for partition in range(partitions)]
+            )
+    
+    def send(self, links):
+        """Queue (partition, url, depth, lastmod, priority) rows in one transaction"""
+        if links:
+            with self.conn:
+                self.conn.executemany(
+                    'INSERT INTO links (partition, url, depth, lastmod, priority) VALUES (?, ?, ?, ?, ?)',
+                    links
+                )
+    
+    def receive(self, partition, limit=5000):
+        """Take up to `limit` queued links for a partition
+        
+        Rows are deleted and the worker marked busy in the same
+        transaction, so the coordinator never sees a link vanish while its
+        worker still looks idle.
+        """
+        with self.conn:
+            rows = self.conn.execute(
+                'SELECT id, url, depth, lastmod, priority FROM links'
+                ' WHERE partition = ? ORDER BY id LIMIT ?', (partition, limit)
+            ).fetchall()
+            if rows:
+                self.conn.execute('DELETE FROM links WHERE partition = ? AND id <= ?',
+                                  (partition, rows[-1][0]))
+                self.conn.execute('UPDATE workers SET idle = 0 WHERE partition = ?', (partition,))
+        return [row[1:] for row in rows]
+    
+    def heartbeat(self, partition, crawled, discovered, idle=False):
+        with self.conn:
+            self.conn.execute(
+                'UPDATE workers SET idle = ?, crawled = ?, discovered = ?, heartbeat = ? WHERE partition = ?',
+                (int(idle), crawled, discovered, time.time(), partition)
+            )
+    
+    def touch(self, partition):
+        """Refresh a worker's heartbeat only (safe from any thread)"""
+        with self.shared_lock, self.shared_conn:
+            self.shared_conn.execute('UPDATE workers SET heartbeat = ? WHERE partition = ?',
+                                     (time.time(), partition))
+    
+    def reserve_host(self, host, delay):
+        """Claim the next request start for `host` across all workers
+        
+        One UPSERT, so concurrent workers never claim the same slot.
+        Returns the seconds to wait until the claimed start.
+        """
+        now = time.time()
+        with self.shared_lock, self.shared_conn:
+            next_start, = self.shared_conn.execute(
+                'INSERT INTO hosts (host, next_start, paused_until) VALUES (?, ? + ?, 0)'
+                ' ON CONFLICT (host) DO UPDATE SET next_start = max(?, next_start, paused_until) + ?'
+                ' RETURNING next_start', (host, now, delay, now, delay)
+            ).fetchone()
+        return max(0.0, next_start - delay - now)
+    
+    def pause_host(self, host, seconds):
+        """Stop every worker from starting requests to `host` for `seconds`"""
+        until = time.time() + seconds
+        with self.shared_lock, self.shared_conn:
+            self.shared_conn.execute(
+                'INSERT INTO hosts (host, next_start, paused_until) VALUES (?, 0, ?)'
+                ' ON CONFLICT (host) DO UPDATE SET paused_until = max(paused_until, ?)',
+                (host, until, until)
+            )
+    
+    def progress(self):
+        """(pages crawled, URLs discovered) summed over workers"""
+        crawled, discovered = self.conn.execute(
+            'SELECT COALESCE(SUM(crawled), 0), COALESCE(SUM(discovered), 0) FROM workers').fetchone()
+        return crawled, discovered
+    
+    def quiescent(self):
+        """True when every worker is idle and no links are waiting"""
+        # One statement, so both answers come from the same snapshot
+        busy, queued = self.conn.execute(
+            'SELECT (SELECT COUNT(*) FROM workers WHERE idle = 0), EXISTS (SELECT 1 FROM links)'
+        ).fetchone()
+        return busy == 0 and not queued
+    
+    def stale_workers(self, max_age):
+        """Partitions whose worker has not reported for `max_age` seconds"""
+        return [row[0] for row in self.conn.execute(
+            'SELECT partition FROM workers WHERE summary IS NULL AND heartbeat < ?',
+            (time.time() - max_age,))]
+    
+    def finish(self):
+        """Tell workers the crawl is over"""
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO control (key, value) VALUES ('done', '1')")
+    
+    def finished(self):
+        return self.conn.execute("SELECT 1 FROM control WHERE key = 'done'").fetchone() is not None
+    
+    def publish(self, partition, pages, summary):
+        """Store a worker's pages (url, state, lastmod, duplicate_of, location) and summary"""
+        batch = []
+        with self.conn:
+            for url, state, lastmod, duplicate_of, location in pages:
+                batch.append((url, partition, state, lastmod, duplicate_of, location))
+                if len(batch) >= 5000:
+                    self.conn.executemany('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)', batch)
+                    batch = []
+            self.conn.executemany('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)', batch)
+            self.conn.execute('UPDATE workers SET summary = ? WHERE partition = ?',
+                              (json.dumps(summary), partition))
+    
+    def published(self):
+        """Partitions whose results are in"""
+        return [row[0] for row in self.conn.execute(
+            'SELECT partition FROM workers WHERE summary IS NOT NULL')]
+    
+    def pages(self):
+        yield from self.conn.execute(
+            'SELECT url, state, lastmod, duplicate_of, location FROM pages ORDER BY rowid')
+    
+    def summaries(self):
+        return [(partition, json.loads(summary)) for partition, summary in self.conn.execute(
+            'SELECT partition, summary FROM workers WHERE summary IS NOT NULL ORDER BY partition')]
+    
+    def close(self):
+        self.conn.close()
+        self.shared_conn.close()
+
+
+class LinkExchange:
+    """Routes discovered links to the partition that owns them
+    
+    `partition` is this process's partition, or None for the coordinator
+    (which owns nothing and forwards every seed). Links for other
+    partitions are buffered and sent in batches; each URL is forwarded at
+    most once per process.
+    """
+    
+    def __init__(self, broker, partition, partitions, partition_by='url', batch_size=500):
+        self.broker = broker
+        self.partition = partition
+        self.partitions = partitions
+        self.partition_by = partition_by
+        self.batch_size = batch_size
+        self.outbox = []
+        self.forwarded = URLSeenSet('fingerprint')
+        self.sent = 0
+        self.last_exchange = 0.0
+    
+    def owns(self, url):
+        return partition_of(url, self.partitions, self.partition_by) == self.partition
+    
+    def forward(self, url, depth=0, lastmod=None, priority=None, link=None):
+        """Queue a link (canonical `url`, sent as `link`) for its owner;
+        False if it was already forwarded"""
+        if url in self.forwarded:
+            return False
+        self.forwarded.add(url)
+        self.outbox.append((partition_of(url, self.partitions, self.partition_by),
+                            link or url, depth, lastmod, priority))
+        if len(self.outbox) >= self.batch_size:
+            self.flush()
+        return True
+    
+    def flush(self):
+        if self.outbox:
+            self.broker.send(self.outbox)
+            self.sent += len(self.outbox)
+            self.outbox = []
+
+
+def worker_path(path, partition):
+    """Per-worker variant of a file path ('cache.db' -> 'cache.w2.db')"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.w{partition}{ext}"
+
+
+class SitemapWriter:
+    """Streaming sitemap writer with shard rollover and a sitemap index
+    
+    Writes <url> entries straight to disk and starts a new shard when the
+    protocol limits (50,000 URLs or 50 MB uncompressed) would be exceeded.
+    A crawl that fits in one plain shard is published as `filename`; larger
+    crawls (or gzip_shards=True) become sitemap-0001.xml[.gz], ... plus a
+    sitemap index at `index_filename`. Files an earlier run left behind in
+    the same directory (extra shards, or the index or single file of the
+    other layout) are removed once the new ones are in place; an index is
+    only removed if it lists nothing but sitemap-NNNN shards, so one
+    published by IncrementalSitemap is left alone.
+    """
+    
+    SHARD_PATTERN = re.compile(r'sitemap-\d{4}\.xml(?:\.gz)?$')
+    MAX_URLS = 50000
+    MAX_BYTES = 50 * 1024 * 1024
+    HEADER = ("<?xml version='1.0' encoding='utf-8'?>\n"
+              '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+    FOOTER = '</urlset>'
+    
+    def __init__(self, filename, base_url, gzip_shards=False,
+                 index_filename='sitemap_index.xml', max_urls=MAX_URLS, max_bytes=MAX_BYTES):
+        self.filename = filename
+        self.directory = os.path.dirname(os.path.abspath(filename))
+        self.base_url = base_url.rstrip('/')
+        self.gzip_shards = gzip_shards
+        self.index_filename = os.path.join(self.directory, index_filename)
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        self.shards = []  # temp paths of finished shards
+        self.file = None
+        self.shard_urls = 0
+        self.shard_bytes = 0
+        self.total_urls = 0
+    
+    def open_shard(self):
+        fd, path = tempfile.mkstemp(suffix='.xml.part', dir=self.directory)
+        os.close(fd)
+        if self.gzip_shards:
+            self.file = gzip.open(path, 'wb')
+        else:
+            self.file = open(path, 'wb')
+        self.shards.append(path)
+        self.shard_urls = 0
+        self.shard_bytes = 0
+        self.write_bytes(self.HEADER.encode('utf-8'))
+    
+    def close_shard(self):
+        self.file.write(self.FOOTER.encode('utf-8'))
+        self.file.close()
+        self.file = None
+    
+    def write_bytes(self, data):
+        self.file.write(data)
+        self.shard_bytes += len(data)
+    
+    @staticmethod
+    def entry_bytes(loc, lastmod, changefreq, priority):
+        """Serialized <url> entry"""
+        return (
+            '  <url>\n'
+            f'    <loc>{escape(loc)}</loc>\n'
+            f'    <lastmod>{lastmod}</lastmod>\n'
+            f'    <changefreq>{changefreq}</changefreq>\n'
+            f'    <priority>{priority}</priority>\n'
+            '  </url>\n'
+        ).encode('utf-8')
+    
+    def add(self, loc, lastmod, changefreq, priority):
+        """Append one <url> entry, rolling over to a new shard at the limits"""
+        entry = self.entry_bytes(loc, lastmod, changefreq, priority)
+        
+        if self.file is not None and (
+            self.shard_urls >= self.max_urls
+            or self.shard_bytes + len(entry) + len(self.FOOTER) > self.max_bytes
+        ):
+            self.close_shard()
+        if self.file is None:
+            self.open_shard()
+        
+        self.write_bytes(entry)
+        self.shard_urls += 1
+        self.total_urls += 1
+    
+    def close(self):
+        """Finish the last shard, publish the files and return their paths"""
+        if self.file is None and not self.shards:
+            self.open_shard()
+        if self.file is not None:
+            self.close_shard()
+        
+        if len(self.shards) == 1 and not self.gzip_shards:
+            os.replace(self.shards[0], self.filename)
+            self.remove_stale([self.filename])
+            return [self.filename]
+        
+        published = []
+        suffix = '.xml.gz' if self.gzip_shards else '.xml'
+        for number, temp_path in enumerate(self.shards, start=1):
+            path = os.path.join(self.directory, f"sitemap-{number:04d}{suffix}")
+            os.replace(temp_path, path)
+            published.append(path)
+        self.write_index(published)
+        self.remove_stale(published + [self.index_filename])
+        return published
+    
+    def remove_stale(self, written):
+        """Delete sitemap files from earlier runs that this run did not write
+        
+        A stale index would keep pointing search engines at old shards.
+        """
+        keep = {os.path.abspath(path) for path in written}
+        candidates = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                      if self.SHARD_PATTERN.match(name)]
+        candidates.append(self.filename)
+        if self.owns_index():
+            candidates.append(self.index_filename)
+        for path in candidates:
+            if os.path.abspath(path) not in keep and os.path.exists(path):
+                os.remove(path)
+    
+    def owns_index(self):
+        """Whether the file at index_filename is an index this writer produced"""
+        try:
+            locs = [element.text or '' for element in ET.parse(self.index_filename).iter()
+                    if element.tag.endswith('loc')]
+        except (OSError, ET.ParseError):
+            return False
+        return all(self.SHARD_PATTERN.match(loc.rsplit('/', 1)[-1]) for loc in locs)
+    
+    def write_index(self, shard_paths):
+        """Write a sitemap index pointing at the published shards"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        write_sitemap_index(self.index_filename, self.base_url,
+                            [(os.path.basename(path), today) for path in shard_paths])
+
+
+def write_sitemap_index(path, base_url, shards):
+    """Atomically write a sitemap index of (shard filename, lastmod) pairs"""
+    temp_path = path + '.part'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write("<?xml version='1.0' encoding='utf-8'?>\n")
+        f.write('<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for name, lastmod in shards:
+            f.write('  <sitemap>\n')
+            f.write(f'    <loc>{escape(base_url)}/{escape(name)}</loc>\n')
+            f.write(f'    <lastmod>{lastmod}</lastmod>\n')
+            f.write('  </sitemap>\n')
+        f.write('</sitemapindex>')
+    os.replace(temp_path, path)
+
+
+def url_category(url):
+    """Report category of a URL (job_listings, company_pages, ..., other)"""
+    url_lower = url.lower()
+    if any(x in url_lower for x in ['job', 'vacancy', 'opening']):
+        return 'job_listings'
+    if any(x in url_lower for x in ['company', 'employer']):
+        return 'company_pages'
+    if any(x in url_lower for x in ['location', 'city', 'jobs-in-']):
+        return 'location_pages'
+    if any(x in url_lower for x in ['department', 'category']):
+        return 'department_pages'
+    if any(x in url_lower for x in ['career', 'hiring']):
+        return 'career_pages'
+    return 'other'
+
+
+def url_hash(url):
+    """Stable non-negative 63-bit hash of a URL (same value in every run)"""
+    digest = hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') >> 1
+
+
+class IncrementalSitemap:
+    """Stable-shard sitemap publishing against the previous run's manifest
+    
+    URLs are assigned to shards by a hash of the URL within a prefix
+    ('shard', or the URL's category), and a URL keeps its shard from run to
+    run. A prefix only gets more shards (doubling) when it outgrows them;
+    URLs already in the manifest stay where they are and only new URLs
+    are hashed over the larger set. A prefix is rehashed from scratch only
+    when one of its shards would exceed the protocol limits.
+    Each shard's content digest is compared with the manifest, and only
+    shards whose URLs or tags changed are rewritten (and re-gzipped).
+    URLs without a known lastmod keep the previous run's date. Added,
+    changed and removed URLs are written to a JSON-lines delta file.
+    Output of SitemapWriter left in the directory (`single_filename` and
+    sitemap-NNNN shards) is removed once the index is in place.
+    """
+    
+    TARGET_URLS = SitemapWriter.MAX_URLS // 2  # per shard, leaves room to grow
+    
+    def __init__(self, manifest_path, directory, base_url, gzip_shards=False,
+                 index_filename='sitemap_index.xml', delta_filename='sitemap_delta.jsonl',
+                 single_filename=None, batch_size=1000):
+        self.directory = directory
+        self.base_url = base_url.rstrip('/')
+        self.gzip_shards = gzip_shards
+        self.index_filename = os.path.join(directory, index_filename)
+        self.delta_filename = os.path.join(directory, delta_filename)
+        self.single_filename = single_filename and os.path.join(directory, single_filename)
+        self.batch_size = batch_size
+        self.batch = []
+        self.conn = sqlite3.connect(manifest_path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' url TEXT PRIMARY KEY, shard TEXT, lastmod TEXT, changefreq TEXT, priority TEXT)'
+        )
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS shards ('
+            ' shard TEXT PRIMARY KEY, file TEXT, digest TEXT, urls INTEGER, lastmod TEXT)'
+        )
+        self.conn.execute('CREATE TABLE IF NOT EXISTS prefixes (prefix TEXT PRIMARY KEY, buckets INTEGER)')
+        self.conn.execute(
+            'CREATE TEMP TABLE pending ('
+            ' url TEXT PRIMARY KEY, prefix TEXT, hash INTEGER, shard TEXT,'
+            ' lastmod TEXT, changefreq TEXT, priority TEXT)'
+        )
+    
+    def add(self, url, prefix, lastmod, changefreq, priority):
+        """Stage one URL of this run (lastmod None if unknown)"""
+        self.batch.append((url, prefix, url_hash(url), lastmod, changefreq, priority))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+    
+    def flush(self):
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO pending (url, prefix, hash, lastmod, changefreq, priority)'
+                ' VALUES (?, ?, ?, ?, ?, ?)', self.batch
+            )
+        self.batch = []
+    
+    def assign_shards(self):
+        """Hash-bucket each prefix, doubling a prefix's buckets only when it outgrows them"""
+        buckets = dict(self.conn.execute('SELECT prefix, buckets FROM prefixes'))
+        for prefix, count in self.conn.execute(
+                'SELECT prefix, COUNT(*) FROM pending GROUP BY prefix').fetchall():
+            buckets[prefix] = buckets.get(prefix) or 1
+            while count > buckets[prefix] * self.TARGET_URLS:
+                buckets[prefix] *= 2
+            self.assign_prefix(prefix, buckets[prefix])
+        return buckets
+    
+    def assign_prefix(self, prefix, buckets, keep_shards=True):
+        """Hash a prefix's URLs into `buckets` shards (keeping manifest shards unless told not to)"""
+        shard = "prefix || '-' || printf('%04d', hash % ?)"
+        if keep_shards:
+            shard = (f"COALESCE((SELECT e.shard FROM entries e WHERE e.url = pending.url"
+                     f" AND substr(e.shard, 1, length(e.shard) - 5) = pending.prefix), {shard})")
+        self.conn.execute(f"UPDATE pending SET shard = {shard} WHERE prefix = ?", (buckets, prefix))
+    
+    def shard_entries(self, shard=None):
+        """Yield (shard, serialized entry, lastmod) in shard and URL order"""
+        if shard is None:
+            rows = self.conn.execute('SELECT shard, url, lastmod, changefreq, priority'
+                                     ' FROM pending ORDER BY shard, url')
+        else:
+            rows = self.conn.execute('SELECT shard, url, lastmod, changefreq, priority'
+                                     ' FROM pending WHERE shard = ? ORDER BY url', (shard,))
+        for shard, url, lastmod, changefreq, priority in rows:
+            yield shard, SitemapWriter.entry_bytes(url, lastmod, changefreq, priority), lastmod
+    
+    def digest_shards(self):
+        """Content digest, URL count, size and newest lastmod of every shard"""
+        summaries = {}
+        for shard, entry, lastmod in self.shard_entries():
+            summary = summaries.get(shard)
+            if summary is None:
+                summary = summaries[shard] = {'hash': hashlib.blake2b(digest_size=16),
+                                              'urls': 0, 'bytes': 0, 'lastmod': lastmod}
+            summary['hash'].update(entry)
+            summary['urls'] += 1
+            summary['bytes'] += len(entry)
+            summary['lastmod'] = max(summary['lastmod'], lastmod)
+        for summary in summaries.values():
+            summary['digest'] = summary.pop('hash').hexdigest()
+        return summaries
+    
+    def write_shard(self, shard, path):
+        """Write one shard file atomically (gzip without a timestamp, so output is reproducible)"""
+        temp_path = path + '.part'
+        with open(temp_path, 'wb') as raw:
+            f = gzip.GzipFile(fileobj=raw, mode='wb', filename='', mtime=0) if self.gzip_shards else raw
+            f.write(SitemapWriter.HEADER.encode('utf-8'))
+            for _, entry, _ in self.shard_entries(shard):
+                f.write(entry)
+            f.write(SitemapWriter.FOOTER.encode('utf-8'))
+            if f is not raw:
+                f.close()
+        os.replace(temp_path, path)
+    
+    def write_delta(self, generated):
+        """Write added/changed/removed URLs as JSON lines; returns the counts"""
+        queries = {
+            'added': 'SELECT p.url, p.lastmod FROM pending p'
+                     ' WHERE NOT EXISTS (SELECT 1 FROM entries e WHERE e.url = p.url)',
+            'changed': 'SELECT p.url, p.lastmod FROM pending p JOIN entries e ON e.url = p.url'
+                       ' WHERE e.lastmod IS NOT p.lastmod OR e.changefreq IS NOT p.changefreq'
+                       ' OR e.priority IS NOT p.priority',
+            'removed': 'SELECT e.url, e.lastmod FROM entries e'
+                       ' WHERE NOT EXISTS (SELECT 1 FROM pending p WHERE p.url = e.url)',
+        }
+        counts = {}
+        temp_path = self.delta_filename + '.part'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for change, query in queries.items():
+                counts[change] = 0
+                for url, lastmod in self.conn.execute(query):
+                    f.write(json.dumps({'change': change, 'url': url, 'lastmod': lastmod,
+                                        'generated': generated}) + '\n')
+                    counts[change] += 1
+        os.replace(temp_path, self.delta_filename)
+        return counts
+    
+    def carry_over(self):
+        """Stage every manifest URL this run did not add, with its previous tags"""
+        self.conn.create_function('url_hash', 1, url_hash, deterministic=True)
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR IGNORE INTO pending (url, prefix, hash, lastmod, changefreq, priority)'
+                " SELECT url, substr(shard, 1, length(shard) - 5), url_hash(url), lastmod, changefreq, priority"
+                ' FROM entries'
+            )
+    
+    def publish(self, today, partial=False):
+        """Rewrite changed shards, the index and the delta; update the manifest
+        
+        A partial run (interrupted crawl) keeps every URL of the previous
+        manifest it did not reach, so nothing is reported removed.
+        """
+        self.flush()
+        if partial:
+            self.carry_over()
+        # URLs with no known date keep the date they were last published with
+        self.conn.execute(
+            'UPDATE pending SET lastmod = COALESCE('
+            ' (SELECT e.lastmod FROM entries e WHERE e.url = pending.url), ?)'
+            ' WHERE lastmod IS NULL', (today,)
+        )
+        buckets = self.assign_shards()
+        self.conn.execute('CREATE INDEX pending_shard ON pending (shard)')
+        
+        # A hash bucket over the protocol limits splits its whole prefix
+        while True:
+            summaries = self.digest_shards()
+            oversized = {shard.rsplit('-', 1)[0] for shard, summary in summaries.items()
+                         if summary['urls'] > SitemapWriter.MAX_URLS
+                         or summary['bytes'] + 1024 > SitemapWriter.MAX_BYTES}
+            if not oversized:
+                break
+            for prefix in oversized:
+                buckets[prefix] *= 2
+                self.assign_prefix(prefix, buckets[prefix], keep_shards=False)
+        
+        suffix = '.xml.gz' if self.gzip_shards else '.xml'
+        previous = {row[0]: row[1:] for row in self.conn.execute(
+            'SELECT shard, file, digest FROM shards')}
+        written, unchanged = [], []
+        for shard in sorted(summaries):
+            name = f"{shard}{suffix}"
+            path = os.path.join(self.directory, name)
+            if previous.get(shard) == (name, summaries[shard]['digest']) and os.path.exists(path):
+                unchanged.append(name)
+                continue
+            self.write_shard(shard, path)
+            written.append(name)
+        
+        # Shards that disappeared, or changed file name (gzip toggled)
+        removed = []
+        for shard, (name, _) in previous.items():
+            if shard not in summaries or name != f"{shard}{suffix}":
+                path = os.path.join(self.directory, name)
+                if os.path.exists(path):
+                    os.remove(path)
+                if shard not in summaries:
+                    removed.append(name)
+        
+        # SitemapWriter output from a plain run (its index replaced ours)
+        leftovers = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                     if SitemapWriter.SHARD_PATTERN.match(name)
+                     or os.path.join(self.directory, name) == self.single_filename]
+        
+        if written or removed or leftovers or not os.path.exists(self.index_filename):
+            write_sitemap_index(self.index_filename, self.base_url,
+                                [(f"{shard}{suffix}", summaries[shard]['lastmod'])
+                                 for shard in sorted(summaries)])
+        for path in leftovers:
+            os.remove(path)
+        counts = self.write_delta(datetime.now().isoformat())
+        
+        # Update the manifest with this run's differences only
+        with self.conn:
+            self.conn.execute('DELETE FROM entries WHERE NOT EXISTS'
+                              ' (SELECT 1 FROM pending p WHERE p.url = entries.url)')
+            self.conn.execute(
+                'INSERT OR REPLACE INTO entries (url, shard, lastmod, changefreq, priority)'
+                ' SELECT p.url, p.shard, p.lastmod, p.changefreq, p.priority FROM pending p'
+                ' WHERE NOT EXISTS (SELECT 1 FROM entries e WHERE e.url = p.url AND e.shard = p.shard'
+                ' AND e.lastmod IS p.lastmod AND e.changefreq IS p.changefreq AND e.priority IS p.priority)'
+            )
+            self.conn.execute('DELETE FROM shards')
+            self.conn.executemany('INSERT INTO shards VALUES (?, ?, ?, ?, ?)', [
+                (shard, f"{shard}{suffix}", summary['digest'], summary['urls'], summary['lastmod'])
+                for shard, summary in summaries.items()
+            ])
+            self.conn.execute('DELETE FROM prefixes')
+            self.conn.executemany('INSERT INTO prefixes VALUES (?, ?)', buckets.items())
+            self.conn.execute('DROP TABLE pending')
+        
+        return {
+            'shards': len(summaries),
+            'shards_written': len(written),
+            'shards_unchanged': len(unchanged),
+            'shards_removed': len(removed),
+            'urls': sum(summary['urls'] for summary in summaries.values()),
+            'urls_added': counts['added'],
+            'urls_changed': counts['changed'],
+            'urls_removed': counts['removed'],
+            'files': [os.path.join(self.directory, name) for name in written],
+            'index': self.index_filename,
+            'delta': self.delta_filename,
+        }
+    
+    def close(self):
+        self.conn.close()
+
+
+def lastmod_date(entry):
+    """Best known modification date (YYYY-MM-DD) for a cached page"""
+    if entry.get('last_modified'):
+        try:
+            return parsedate_to_datetime(entry['last_modified']).strftime('%Y-%m-%d')
+        except (TypeError, ValueError):
+            pass
+    return entry.get('changed_at')
+
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (count, sum, max and bucket counts)"""
+    
+    __slots__ = ('counts', 'count', 'total', 'max')
+    
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def observe(self, seconds):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+    
+    def quantile(self, q):
+        """Estimated q-quantile, interpolated within its bucket (capped at max)"""
+        rank = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            if count and cumulative + count >= rank:
+                return min(lower + (bound - lower) * (rank - cumulative) / count, self.max)
+            cumulative += count
+            lower = bound
+        return self.max
+    
+    def merge(self, counts, count, total, maximum):
+        """Add another histogram's raw state (see CrawlMetrics.snapshot)"""
+        self.counts = [a + b for a, b in zip(self.counts, counts)]
+        self.count += count
+        self.total += total
+        self.max = max(self.max, maximum)
+    
+    def summary(self):
+        return {
+            'count': self.count,
+            'total_seconds': round(self.total, 3),
+            'mean_ms': round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            'p50_ms': round(self.quantile(0.50) * 1000, 2),
+            'p95_ms': round(self.quantile(0.95) * 1000, 2),
+            'max_ms': round(self.max * 1000, 2),
+        }
+
+
+class CrawlMetrics:
+    """Per-stage timers, response counters and per-host latency for one crawl
+    
+    Safe to update from fetch threads. Each observation is a bisect and a
+    few additions under a lock, cheap enough to leave on for every page.
+    Stages: probe, sitemap_ingest, fetch (whole request), download (body
+    after the headers arrived), decode, parse, extract, filter,
+    canonicalize, throttle_wait and write.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}  # stage -> Histogram
+        self.hosts = {}   # host -> Histogram of time to response headers
+        self.status_codes = Counter()
+        self.errors = Counter()
+        self.events = Counter()  # e.g. skipped_non_html, truncated_body
+        self.bytes_downloaded = 0
+    
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+    
+    def observe_many(self, timings):
+        """Record a {stage: seconds} dict (e.g. from a parse worker)"""
+        with self.lock:
+            for stage, seconds in timings.items():
+                histogram = self.stages.get(stage)
+                if histogram is None:
+                    histogram = self.stages[stage] = Histogram()
+                histogram.observe(seconds)
+    
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+    
+    def record_response(self, host, status, size, latency):
+        with self.lock:
+            self.status_codes[status] += 1
+            self.bytes_downloaded += size
+            histogram = self.hosts.get(host)
+            if histogram is None:
+                histogram = self.hosts[host] = Histogram()
+            histogram.observe(latency)
+    
+    def record_error(self, kind):
+        with self.lock:
+            self.errors[kind] += 1
+    
+    def count(self, event):
+        with self.lock:
+            self.events[event] += 1
+    
+    def snapshot(self):
+        """Raw, JSON-serializable state for merging across processes"""
+        def raw(histograms):
+            return {name: [h.counts, h.count, h.total, h.max] for name, h in histograms.items()}
+        with self.lock:
+            return {
+                'stages': raw(self.stages),
+                'hosts': raw(self.hosts),
+                'status_codes': dict(self.status_codes),
+                'errors': dict(self.errors),
+                'events': dict(self.events),
+                'bytes_downloaded': self.bytes_downloaded,
+            }
+    
+    def merge(self, snapshot):
+        """Fold in another process's snapshot (e.g. a distributed worker's)"""
+        with self.lock:
+            for field in ('stages', 'hosts'):
+                histograms = getattr(self, field)
+                for name, state in snapshot[field].items():
+                    histograms.setdefault(name, Histogram()).merge(*state)
+            self.status_codes.update({int(status): count for status, count in snapshot['status_codes'].items()})
+            self.errors.update(snapshot['errors'])
+            self.events.update(snapshot['events'])
+            self.bytes_downloaded += snapshot['bytes_downloaded']
+    
+    def to_dict(self):
+        """Report section: stage summaries, traffic and per-host latency"""
+        with self.lock:
+            return {
+                'stages': {stage: histogram.summary() for stage, histogram in sorted(self.stages.items())},
+                'bytes_downloaded': self.bytes_downloaded,
+                'status_codes': {str(status): count for status, count in sorted(self.status_codes.items())},
+                'errors': dict(self.errors),
+                'events': dict(self.events),
+                'host_latency': {host: histogram.summary() for host, histogram in sorted(self.hosts.items())},
+            }
+    
+    def prometheus_text(self, prefix='sitemap'):
+        """Metrics in the Prometheus text exposition format"""
+        def histogram_lines(name, label, value, histogram):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), histogram.counts):
+                cumulative += count
+                yield f'{name}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}'
+            yield f'{name}_sum{{{label}="{value}"}} {histogram.total:.6f}'
+            yield f'{name}_count{{{label}="{value}"}} {histogram.count}'
+        
+        with self.lock:
+            lines = [f'# HELP {prefix}_stage_seconds Time spent per crawl stage',
+                     f'# TYPE {prefix}_stage_seconds histogram']
+            for stage, histogram in sorted(self.stages.items()):
+                lines.extend(histogram_lines(f'{prefix}_stage_seconds', 'stage', stage, histogram))
+            lines += [f'# HELP {prefix}_host_latency_seconds Time to response headers per host',
+                      f'# TYPE {prefix}_host_latency_seconds histogram']
+            for host, histogram in sorted(self.hosts.items()):
+                lines.extend(histogram_lines(f'{prefix}_host_latency_seconds', 'host', host, histogram))
+            lines += [f'# HELP {prefix}_responses_total HTTP responses by status code',
+                      f'# TYPE {prefix}_responses_total counter']
+            lines += [f'{prefix}_responses_total{{status="{status}"}} {count}'
+                      for status, count in sorted(self.status_codes.items())]
+            lines += [f'# HELP {prefix}_request_errors_total Requests that got no response',
+                      f'# TYPE {prefix}_request_errors_total counter']
+            lines += [f'{prefix}_request_errors_total{{error="{kind}"}} {count}'
+                      for kind, count in sorted(self.errors.items())]
+            lines += [f'# HELP {prefix}_events_total Notable fetch events (skipped or truncated bodies)',
+                      f'# TYPE {prefix}_events_total counter']
+            lines += [f'{prefix}_events_total{{event="{event}"}} {count}'
+                      for event, count in sorted(self.events.items())]
+            lines += [f'# HELP {prefix}_bytes_downloaded_total Response bytes read from the network',
+                      f'# TYPE {prefix}_bytes_downloaded_total counter',
+                      f'{prefix}_bytes_downloaded_total {self.bytes_downloaded}']
+        return '\n'.join(lines) + '\n'
+    
+    def write_prometheus(self, path):
+        """Write the metrics to a file (e.g. for node_exporter's textfile collector)"""
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, path)
+    
+    def serve(self, port, host='127.0.0.1'):
+        """Serve /metrics over HTTP from a daemon thread; returns the server"""
+        metrics = self
+        
+        class MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def make_session(pool_connections=10, pool_maxsize=10, pool_block=False):
+    """HTTP session with browser-like headers and a keep-alive connection pool
+    
+    `pool_connections` hosts are kept pooled with up to `pool_maxsize`
+    connections each; with `pool_block`, that is also a hard per-host
+    limit (further requests wait for a free connection).
+    """
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+        # Only what urllib3 can decode here (br/zstd need optional packages)
+        'Accept-Encoding': requests.utils.DEFAULT_ACCEPT_ENCODING,
+        'DNT': '1',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+    })
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          pool_block=pool_block)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class DNSCache:
+    """Process-wide getaddrinfo cache with a fixed TTL
+    
+    Installed for the duration of a multi-site crawl so new connections to
+    any site reuse earlier lookups instead of resolving again.
+    """
+    
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.resolve = socket.getaddrinfo
+        self.hits = 0
+        self.misses = 0
+    
+    def getaddrinfo(self, host, port, *args, **kwargs):
+        key = (host, port, args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+        result = self.resolve(host, port, *args, **kwargs)
+        with self.lock:
+            self.entries[key] = (now + self.ttl, result)
+            self.misses += 1
+        return result
+    
+    def install(self):
+        socket.getaddrinfo = self.getaddrinfo
+    
+    def uninstall(self):
+        socket.getaddrinfo = self.resolve
+
+
+class FairShare:
+    """Fair split of a global in-flight request limit between concurrent crawls
+    
+    A crawl that wants a slot gets one while it is under its fair share
+    (the limit divided by the crawls currently wanting slots). Above its
+    share it only takes slots no under-share crawl is waiting for, so
+    spare capacity is used without starving smaller sites.
+    """
+    
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = Counter()
+        self.wanting = set()
+    
+    def acquire(self, key):
+        """Take a slot for `key` if the fair-share rules allow it"""
+        self.wanting.add(key)
+        if sum(self.active.values()) >= self.limit:
+            return False
+        fair = max(1, self.limit // len(self.wanting))
+        if self.active[key] >= fair and any(
+                self.active[other] < fair for other in self.wanting if other != key):
+            return False
+        self.active[key] += 1
+        return True
+    
+    def release(self, key):
+        self.active[key] -= 1
+    
+    def idle(self, key):
+        """`key` has nothing runnable right now; stop reserving a share for it"""
+        self.wanting.discard(key)
+
+
+class SiteLogger(logging.LoggerAdapter):
+    """Prefixes messages with the site name (keeps each call's `extra`)"""
+    
+    def process(self, msg, kwargs):
+        return f"[{self.extra['site']}] {msg}", kwargs
+
 
 class EnhancedFinploySitemapGenerator:
-    def __init__(self, base_urls, delay=0.5, max_urls=5000):
+    def __init__(self, base_urls, delay=0.5, max_urls=5000, crawl_mode='sync',
+                 concurrency=10, per_host_concurrency=4, cache_file=None,
+                 state_file=None, sitemap_concurrency=4, extractor='fast',
+                 parse_workers=0, seen_set='exact', alias_rules=None, expected_urls=1000000,
+                 allowed_domains=ALLOWED_DOMAINS, skip_extensions=SKIP_EXTENSIONS,
+                 deny_tokens=DENY_TOKENS, job_keywords=None, locations=None, combo_terms=5,
+                 probe_concurrency=16, probe_miss_limit=10, negative_cache_ttl=7 * 24 * 3600,
+                 max_retries=3, retry_backoff=2.0, frontier='priority', metrics_file=None,
+                 metrics_port=None, dedupe='exact', near_duplicate_distance=3,
+                 exclude_duplicates=False, max_body_bytes=5 * 1024 * 1024, stream_parse=True,
+                 sitemap_manifest=None, shard_by='url', mine_bundles=True, max_bundles=200,
+                 site_name=None, output_dir=None, session=None):
         self.base_urls = base_urls
         self.delay = delay
         self.max_urls = max_urls
-        self.discovered_urls = set()
-        self.crawled_urls = set()
-        self.failed_urls = set()
-        self.url_queue = deque()
-        
-        # Setup logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('enhanced_sitemap.log'),
-                logging.StreamHandler()
-            ]
-        )
+        self.crawl_mode = crawl_mode
+        self.concurrency = concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.sitemap_concurrency = sitemap_concurrency
+        self.extractor = extractor  # 'fast' (single-pass tokenizer) or 'soup'
+        self.parse_workers = parse_workers  # async mode: parse in N worker processes
+        self.combo_terms = combo_terms  # top N keywords x top N locations are combined
+        self.probe_concurrency = probe_concurrency
+        self.probe_miss_limit = probe_miss_limit
+        self.negative_cache_ttl = negative_cache_ttl
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff  # base seconds, doubled per attempt
+        self.max_body_bytes = max_body_bytes  # longer pages are cut off
+        self.sitemap_manifest = sitemap_manifest  # incremental sitemap output when set
+        self.shard_by = shard_by  # incremental shards: 'url' (hash) or 'category'
+        self.sitemap_stats = None
+        self.stream_parse = stream_parse  # tokenize bodies while they download
+        
+        # URL canonicalization and seen-sets ('exact' Python sets, or compact
+        # 'fingerprint'/'bloom' sets for crawls in the millions)
+        self.alias_rules = compile_alias_rules(DEFAULT_ALIAS_RULES if alias_rules is None else alias_rules)
+        self.home_urls = set(base_urls) | {self.canonicalize(url) for url in base_urls}
+        self.url_filter = URLFilter(allowed_domains, skip_extensions, deny_tokens)
+        if seen_set == 'exact':
+            self.discovered_urls = set()
+            self.crawled_urls = set()
+            self.failed_urls = set()
+        else:
+            self.discovered_urls = URLSeenSet(seen_set, keep_urls=True, expected_items=expected_urls)
+            self.crawled_urls = URLSeenSet(seen_set, expected_items=expected_urls)
+            self.failed_urls = URLSeenSet(seen_set, expected_items=expected_urls)
+        # Canonical URL -> URL fetched and published for it: as linked, then
+        # as served after redirects (only where the two differ); and canonical
+        # URL -> lastmod date. Kept on disk alongside compact seen-sets.
+        self.page_urls = {} if seen_set == 'exact' else URLTable()
+        self.lastmod_dates = {} if seen_set == 'exact' else URLTable()
+        
+        # Crawl frontier: 'priority' (scored heap) or 'fifo'
+        self.frontier = frontier
+        self.url_queue = PriorityFrontier() if frontier == 'priority' else FIFOFrontier()
+        self.url_depths = {}     # link depth of queued and in-flight URLs
+        self.pattern_stats = {}  # url_pattern -> [pages crawled, new links found]
+        
+        # Adaptive per-host throttles and delayed retries of transient failures
+        self.throttles = {}
+        self.retry_queue = []  # heap of (due time, sequence, url)
+        self.retry_attempts = {}
+        self.retry_stats = Counter()
+        self.retry_sequence = itertools.count()
+        
+        # Duplicate content: 'off', 'exact' (body hash and rel=canonical) or
+        # 'near' (also SimHash, opt-in: pages sharing a template fingerprint
+        # close together); copies can be left out of the sitemap
+        self.dedupe = dedupe
+        self.exclude_duplicates = exclude_duplicates
+        self.content_index = DuplicateIndex(near_duplicate_distance)
+        self.duplicate_of = {}  # duplicate URL -> URL it copies
+        self.duplicate_stats = Counter()
+        
+        # Same-origin JavaScript bundles scanned for routes: each bundle URL
+        # is fetched once per run, each distinct body scanned once
+        self.mine_bundles = mine_bundles
+        self.max_bundles = max_bundles
+        self.bundle_lock = threading.Lock()
+        self.mined_bundles = set()  # bundle URLs claimed this run
+        self.bundle_routes = {}  # body hash -> route candidates
+        self.bundle_stats = Counter()
+        
+        # Validator cache for conditional GETs (disabled when cache_file is None)
+        self.cache = ValidatorCache(cache_file) if cache_file else None
+        
+        # Checkpointed crawl state for --resume (disabled when state_file is None)
+        self.state = CrawlStateStore(state_file) if state_file else None
+        
+        # Distributed mode: link routing between partitions (see run_worker)
+        self.exchange = None
+        self.worker_summaries = []
+        
+        # Per-stage timings and traffic counters, exported with the report
+        # (and to a Prometheus textfile / live /metrics endpoint if configured)
+        self.metrics = CrawlMetrics()
+        self.metrics_file = metrics_file
+        self.metrics_server = self.metrics.serve(metrics_port) if metrics_port else None
+        
+        # Setup logging (defaults unless logging is already configured, so
+        # several generators in one process never stack handlers)
+        if not _logging and not logging.getLogger().handlers:
+            configure_logging()
         self.logger = logging.getLogger(__name__)
+        self.events = self.logger.getChild('events')  # per-URL crawl records
         
-        # Enhanced session with better headers
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
+        # Multi-site mode: outputs go to the site's directory, log lines are
+        # tagged with its name and request slots are shared fairly (see crawl_sites)
+        self.site_name = site_name
+        self.output_dir = output_dir
+        self.share = None
+        if site_name:
+            self.logger = SiteLogger(self.logger, {'site': site_name})
+        
+        # Enhanced session with better headers; the connection pool is sized
+        # so concurrent fetches don't queue on it (or shared between sites)
+        self.session = session or make_session(
+            pool_connections=max(10, len(base_urls)),
+            pool_maxsize=max(10, concurrency, probe_concurrency, sitemap_concurrency))
         
         self.start_time = time.time()
         
-        # Common job-related terms for URL generation
-        self.job_keywords = [
-            'software', 'developer', 'engineer', 'manager', 'analyst', 'consultant',
-            'sales', 'marketing', 'finance', 'hr', 'admin', 'support', 'designer',
-            'data', 'product', 'project', 'business', 'customer', 'technical'
-        ]
-        
-        # Common locations 
-        self.locations = [
-            'mumbai', 'delhi', 'bangalore', 'hyderabad', 'chennai', 'pune', 
-            'kolkata', 'ahmedabad', 'jaipur', 'lucknow', 'kanpur', 'nagpur',
-            'indore', 'bhopal', 'visakhapatnam', 'patna', 'vadodara', 'ghaziabad',
-            'london', 'manchester', 'birmingham', 'leeds', 'glasgow', 'liverpool',
-            'bristol', 'sheffield', 'edinburgh', 'leicester'
-        ]
+        # Seed terms for URL generation
+        self.job_keywords = list(JOB_KEYWORDS if job_keywords is None else job_keywords)
+        self.locations = list(LOCATIONS if locations is None else locations)
         
     def check_existing_sitemaps(self):
         """Check for existing sitemaps and robots.txt"""
@@ -82,345 +2219,1634 @@ class EnhancedFinploySitemapGenerator:
             
             for sitemap_url in potential_sitemaps:
                 try:
-                    response = self.session.get(sitemap_url, timeout=10)
-                    if response.status_code == 200:
-                        if sitemap_url.endswith('robots.txt'):
-                            # Parse robots.txt for sitemap references
-                            for line in response.text.split('\n'):
-                                line = line.strip()
-                                if line.lower().startswith('sitemap:'):
-                                    sitemap_ref = line.split(':', 1)[1].strip()
-                                    sitemap_urls.append(sitemap_ref)
-                        else:
-                            sitemap_urls.append(sitemap_url)
-                            self.logger.info(f"Found existing sitemap: {sitemap_url}")
+                    if sitemap_url.endswith('robots.txt'):
+                        sitemap_urls.extend(self.read_robots(sitemap_url))
+                    else:
+                        # Only the status is needed here; the body is streamed later
+                        with self.session.get(sitemap_url, timeout=10, stream=True) as response:
+                            if response.status_code == 200:
+                                sitemap_urls.append(sitemap_url)
+                                self.logger.info(f"Found existing sitemap: {sitemap_url}")
                 except:
                     continue
         
-        return sitemap_urls
+        # robots.txt often lists the same sitemaps we already probed
+        return list(dict.fromkeys(sitemap_urls))
     
-    def parse_sitemap(self, sitemap_url):
-        """Parse XML sitemap to extract URLs"""
+    def read_robots(self, robots_url):
+        """Apply robots.txt Crawl-delay and return the sitemaps it lists"""
+        sitemap_urls = []
         try:
-            response = self.session.get(sitemap_url, timeout=15)
+            response = self.session.get(robots_url, timeout=10)
+        except Exception:
+            return sitemap_urls
+        if response.status_code != 200:
+            return sitemap_urls
+        
+        applies_to_us = False
+        for line in response.text.split('\n'):
+            line = line.split('#', 1)[0].strip()
+            field, _, value = line.partition(':')
+            field, value = field.strip().lower(), value.strip()
+            if field == 'user-agent':
+                applies_to_us = value == '*'
+            elif field == 'crawl-delay' and applies_to_us:
+                try:
+                    crawl_delay = float(value)
+                except ValueError:
+                    continue
+                self.throttle_for(robots_url).set_crawl_delay(crawl_delay)
+                self.logger.info(f"🐢 Crawl-delay {crawl_delay}s for {urlparse(robots_url).netloc}")
+            elif field == 'sitemap' and value:
+                # Parse robots.txt for sitemap references (resolving relative ones)
+                sitemap_urls.append(urljoin(robots_url, value))
+        return sitemap_urls
+    
+    def stream_sitemap(self, sitemap_url):
+        """Stream one sitemap, yielding ('url' | 'sitemap', loc, lastmod, priority)
+        
+        Parses incrementally with iterparse and transparently decompresses
+        gzip sitemaps, so memory use does not depend on the sitemap size.
+        """
+        with self.session.get(sitemap_url, timeout=15, stream=True) as response:
             response.raise_for_status()
+            response.raw.decode_content = True
+            response.raw.auto_close = False  # let BufferedReader see a clean EOF
+            stream = io.BufferedReader(response.raw)
+            if stream.peek(2)[:2] == b'\x1f\x8b':
+                stream = gzip.GzipFile(fileobj=stream)
             
-            # Try to parse as XML
+            root = None
             try:
-                root = ET.fromstring(response.content)
+                for event, elem in ET.iterparse(stream, events=('start', 'end')):
+                    if root is None:
+                        root = elem
+                    if event != 'end':
+                        continue
+                    tag = elem.tag.rsplit('}', 1)[-1]
+                    if tag not in ('url', 'sitemap'):
+                        continue
+                    loc = lastmod = priority = None
+                    for child in elem:
+                        child_tag = child.tag.rsplit('}', 1)[-1]
+                        if child_tag == 'loc':
+                            loc = (child.text or '').strip()
+                        elif child_tag == 'lastmod':
+                            lastmod = (child.text or '').strip() or None
+                        elif child_tag == 'priority':
+                            try:
+                                priority = float(child.text)
+                            except (TypeError, ValueError):
+                                pass
+                    if loc:
+                        yield tag, loc, lastmod, priority
+                    # Drop parsed entries so the tree never grows
+                    root.clear()
             except ET.ParseError:
-                return []
+                # Not XML (e.g. an HTML sitemap page)
+                return
+    
+    def ingest_sitemaps(self, sitemap_urls):
+        """Yield (loc, lastmod, priority) from sitemaps and nested indexes as they arrive
+        
+        Child sitemaps of an index are fetched concurrently (at most
+        `sitemap_concurrency` at a time), each sitemap is fetched once, and
+        a bounded queue applies backpressure when the consumer is slower
+        than the fetchers.
+        """
+        results = queue.Queue(maxsize=10000)
+        done = object()
+        stop = threading.Event()
+        lock = threading.Lock()
+        seen = set()
+        pending = [0]
+        executor = ThreadPoolExecutor(max_workers=self.sitemap_concurrency)
+        
+        def put(item):
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+        
+        def submit(sitemap_url):
+            with lock:
+                if stop.is_set() or sitemap_url in seen:
+                    return
+                seen.add(sitemap_url)
+                pending[0] += 1
+            executor.submit(worker, sitemap_url)
+        
+        def worker(sitemap_url):
+            count = 0
+            start = time.perf_counter()
+            try:
+                for kind, loc, lastmod, priority in self.stream_sitemap(sitemap_url):
+                    if stop.is_set():
+                        return
+                    if kind == 'sitemap':
+                        submit(loc)
+                    else:
+                        count += 1
+                        put((loc, lastmod, priority))
+                self.logger.info(f"Extracted {count} URLs from sitemap: {sitemap_url}")
+            except Exception as e:
+                self.logger.error(f"Error parsing sitemap {sitemap_url}: {e}")
+            finally:
+                self.metrics.observe('sitemap_ingest', time.perf_counter() - start)
+                put(done)
+        
+        try:
+            for sitemap_url in sitemap_urls:
+                submit(sitemap_url)
+            while True:
+                with lock:
+                    if pending[0] == 0:
+                        break
+                item = results.get()
+                if item is done:
+                    with lock:
+                        pending[0] -= 1
+                else:
+                    yield item
+        finally:
+            stop.set()
+            executor.shutdown(wait=False)
+    
+    def parse_sitemap(self, sitemap_url):
+        """Parse XML sitemap to extract URLs"""
+        return [loc for loc, lastmod, priority in self.ingest_sitemaps([sitemap_url])]
+    
+    def generate_probe_candidates(self):
+        """Potential URLs grouped by template, e.g. '<base>/jobs-in-{location}'"""
+        templates = {}
+        seen = set()
+        
+        def add(template, url):
+            # '/jobs' and '/jobs/' are one page after canonicalization
+            canonical = self.canonicalize(url)
+            if canonical not in seen:
+                seen.add(canonical)
+                templates.setdefault(template, []).append(url)
+        
+        for base_url in self.base_urls:
+            # Add common page patterns (each is its own template)
+            common_patterns = [
+                '/jobs', '/jobs/', '/careers', '/careers/', '/vacancies', '/opportunities',
+                '/companies', '/employers', '/locations', '/departments', '/categories',
+                '/search', '/browse', '/find-jobs', '/job-search',
+                '/about', '/contact', '/privacy', '/terms', '/help', '/faq'
+            ]
+            
+            for pattern in common_patterns:
+                add(f"{base_url}{pattern}", f"{base_url}{pattern}")
+            
+            # Generate location-based job URLs
+            for location in self.locations:
+                add(f"{base_url}/jobs-in-{{location}}", f"{base_url}/jobs-in-{location}")
+                add(f"{base_url}/jobs/{{location}}", f"{base_url}/jobs/{location}")
+                add(f"{base_url}/careers-in-{{location}}", f"{base_url}/careers-in-{location}")
             
-            urls = []
+            # Generate job category URLs
+            for keyword in self.job_keywords:
+                add(f"{base_url}/{{keyword}}-jobs", f"{base_url}/{keyword}-jobs")
+                add(f"{base_url}/jobs/{{keyword}}", f"{base_url}/jobs/{keyword}")
+                add(f"{base_url}/{{keyword}}-careers", f"{base_url}/{keyword}-careers")
             
-            # Handle sitemap index files
-            if 'sitemapindex' in root.tag.lower():
-                for sitemap in root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}sitemap'):
-                    loc = sitemap.find('{http://www.sitemaps.org/schemas/sitemap/0.9}loc')
-                    if loc is not None and loc.text:
-                        # Recursively parse sub-sitemaps
-                        sub_urls = self.parse_sitemap(loc.text)
-                        urls.extend(sub_urls)
+            # Generate combined location + job type URLs
+            for keyword in self.job_keywords[:self.combo_terms]:
+                for location in self.locations[:self.combo_terms]:
+                    add(f"{base_url}/{{keyword}}-jobs-in-{{location}}",
+                        f"{base_url}/{keyword}-jobs-in-{location}")
+        
+        return templates
+    
+    def generate_potential_urls(self):
+        """Generate potential URLs based on common patterns"""
+        return {url for urls in self.generate_probe_candidates().values() for url in urls}
+    
+    def is_valid_url(self, url):
+        """Enhanced URL validation"""
+        return self.url_filter.check(url) is None
+    
+    def extract_urls_comprehensive(self, url, soup):
+        """Comprehensive URL extraction"""
+        urls = set()
+        
+        # Extract all anchor links
+        for link in soup.find_all('a', href=True):
+            href = link['href'].strip()
+            if href and not href.startswith(('#', 'mailto:', 'tel:', 'javascript:')):
+                full_url = urljoin(url, href).split('#')[0]
+                if self.is_valid_url(full_url):
+                    urls.add(full_url)
+        
+        # Look for URLs in various attributes
+        url_attributes = ['data-href', 'data-url', 'data-link', 'href']
+        for attr in url_attributes:
+            for elem in soup.find_all(attrs={attr: True}):
+                href = elem[attr]
+                if href and isinstance(href, str):
+                    full_url = urljoin(url, href).split('#')[0]
+                    if self.is_valid_url(full_url):
+                        urls.add(full_url)
+        
+        # Enhanced JavaScript parsing
+        for script in soup.find_all('script'):
+            if script.string:
+                for match in script_link_candidates(script.string):
+                    full_url = urljoin(url, match).split('#')[0]
+                    if self.is_valid_url(full_url):
+                        urls.add(full_url)
+        
+        return urls
+    
+    def extract_urls_fast(self, url, html):
+        """Single-pass URL extraction with the streaming tokenizer"""
+        timings = {}
+        candidates = extract_link_candidates(url, html, timings)
+        return self.filter_candidates(candidates, timings)
+    
+    def filter_candidates(self, candidates, timings):
+        """Valid URLs among extracted candidates; records the stage timings"""
+        start = time.perf_counter()
+        urls = {full_url for full_url in candidates if self.is_valid_url(full_url)}
+        timings['filter'] = time.perf_counter() - start
+        self.metrics.observe_many(timings)
+        return urls
+    
+    def parse_page(self, url, response):
+        """Parse a page once: (parsed page, content fingerprint, rel=canonical href)
+        
+        The parsed page (a LinkTokenizer, or BeautifulSoup with the 'soup'
+        extractor) is handed to resolve_links once the page is known not to
+        be a near duplicate. Pages tokenized while streaming are not parsed
+        again.
+        """
+        if getattr(response, 'tokenizer', None) is not None:
+            tokenizer = response.tokenizer
+            with self.metrics.timer('fingerprint'):
+                fingerprint = tokenizer.fingerprint() if self.dedupe == 'near' else None
+            return tokenizer, fingerprint, tokenizer.canonical
+        if self.extractor == 'fast':
+            try:
+                start = time.perf_counter()
+                html = decode_body(response.content, response.headers.get('content-type', ''))
+                decoded_at = time.perf_counter()
+                tokenizer = tokenize_page(html)
+                parsed_at = time.perf_counter()
+                fingerprint = tokenizer.fingerprint() if self.dedupe == 'near' else None
+                self.metrics.observe_many({'decode': decoded_at - start,
+                                           'parse': parsed_at - decoded_at,
+                                           'fingerprint': time.perf_counter() - parsed_at})
+                return tokenizer, fingerprint, tokenizer.canonical
+            except Exception as e:
+                self.logger.warning(f"Fast extractor failed on {url}, falling back to BeautifulSoup: {e}")
+        with self.metrics.timer('parse'):
+            soup = BeautifulSoup(response.content, 'html.parser')
+        fingerprint = None
+        if self.dedupe == 'near':
+            with self.metrics.timer('fingerprint'):
+                fingerprint = soup_fingerprint(soup)
+        canonical = soup.find('link', rel='canonical', href=True)
+        return soup, fingerprint, canonical['href'].strip() if canonical else None
+    
+    def resolve_links(self, url, parsed):
+        """Valid URLs linked from a page returned by parse_page"""
+        if isinstance(parsed, LinkTokenizer):
+            start = time.perf_counter()
+            candidates = resolve_link_candidates(url, parsed)
+            return self.filter_candidates(candidates, {'extract': time.perf_counter() - start})
+        with self.metrics.timer('extract'):
+            return self.extract_urls_comprehensive(url, parsed)
+    
+    def script_sources(self, parsed):
+        """src of every external <script> on a page returned by parse_page"""
+        if isinstance(parsed, LinkTokenizer):
+            return parsed.script_sources
+        return [script['src'].strip() for script in parsed.find_all('script', src=True)]
+    
+    def bundle_urls(self, page_url, script_sources):
+        """Same-origin script bundles among a page's <script src> values
+        
+        Bundles are resolved against the URL the page was served from and
+        kept as referenced (asset servers need not accept canonical
+        spellings). They fail the page-link filter only because of their
+        extension; other rules (domain, deny tokens, length) still apply.
+        """
+        if not self.mine_bundles:
+            return set()
+        origin = urlparse(page_url).netloc.lower()
+        bundles = set()
+        for src in script_sources:
+            bundle = urljoin(page_url, src).split('#')[0]
+            parsed = urlparse(bundle)
+            if (parsed.netloc.lower() == origin and parsed.path.lower().endswith(BUNDLE_EXTENSIONS)
+                    and self.url_filter.reason(bundle) in (None, 'extension:.js')):
+                bundles.add(bundle)
+        return bundles
+    
+    def split_bundles(self, outlinks):
+        """Split cached outlinks into (page links, script bundles)"""
+        bundles = {link for link in outlinks if urlparse(link).path.lower().endswith(BUNDLE_EXTENSIONS)}
+        return outlinks - bundles, (bundles if self.mine_bundles else set())
+    
+    def mine_script_bundles(self, bundle_urls):
+        """Absolute route candidates from bundles not yet mined this run
+        
+        Blocking (safe to call from worker threads). Each bundle (by
+        canonical URL) is fetched at most once per run, conditionally if it
+        is in the validator cache; its routes are looked up by body hash,
+        first in this run's results, then in the cache, and only scanned on
+        a miss.
+        """
+        candidates = set()
+        for bundle in bundle_urls:
+            key = self.canonicalize(bundle)
+            with self.bundle_lock:
+                if key in self.mined_bundles or len(self.mined_bundles) >= self.max_bundles:
+                    continue
+                self.mined_bundles.add(key)
+            try:
+                with self.metrics.timer('bundle'):
+                    routes = self.fetch_bundle_politely(bundle)
+            except Exception as e:
+                self.count_bundles('failed')
+                self.logger.warning("Could not mine script bundle %s: %s", bundle, e)
+                continue
+            self.count_bundles('routes', len(routes))
+            candidates.update(urljoin(bundle, route).split('#')[0] for route in routes)
+        return candidates
+    
+    def count_bundles(self, stat, amount=1):
+        """Add to a bundle_stats counter (fetch threads update them concurrently)"""
+        with self.bundle_lock:
+            self.bundle_stats[stat] += amount
+    
+    def fetch_bundle_politely(self, url, conditional=True):
+        """fetch_bundle_routes paced by the host's throttle, with page-fetch retries
+        
+        Transient failures are retried after the same backoff as pages, but
+        in place (the caller is a fetch thread), since bundles are not
+        crawled from the frontier.
+        """
+        throttle = self.throttle_for(url)
+        attempt = 0
+        while True:
+            now = time.monotonic()
+            start_at = throttle.reserve_start(now)
+            if start_at > now:
+                self.metrics.observe('throttle_wait', start_at - now)
+                self.sleep(start_at - now)
+            try:
+                return self.fetch_bundle_routes(url, conditional)
+            except Exception as e:
+                attempt += 1
+                transient, retry_after = self.classify_failure(url, e)
+                if not transient or attempt > self.max_retries:
+                    raise
+                self.count_bundles('retries')
+                delay = self.retry_delay(attempt, retry_after)
+                self.logger.warning("↻ Retry %d/%d in %.1fs for bundle %s: %s", attempt,
+                                    self.max_retries, delay, url, e)
+                self.sleep(delay)
+    
+    def fetch_bundle_routes(self, url, conditional=True):
+        """Route candidates of one bundle (fetched, then scanned once per content hash)
+        
+        The bundle is requested as referenced and cached under its
+        canonical URL. With conditional=False no validators are sent.
+        """
+        key = self.canonicalize(url)
+        cached = self.cache.get(key) if self.cache and conditional else None
+        headers = {}
+        if cached:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+        
+        body = None
+        with self.session.get(url, timeout=15, headers=headers, stream=True) as response:
+            if response.status_code == 304 and cached:
+                body_hash = cached['body_hash']
+                self.count_bundles('not_modified')
+            else:
+                response.raise_for_status()
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= self.max_body_bytes:
+                        break
+                body = b''.join(chunks)[:self.max_body_bytes]
+                body_hash = hashlib.sha1(body).hexdigest()
+                self.count_bundles('fetched')
+            self.metrics.record_response(urlparse(url).netloc.lower(), response.status_code,
+                                         response.raw.tell() or 0, response.elapsed.total_seconds())
+            self.throttle_for(url).on_success(response.elapsed.total_seconds())
+        
+        routes = self.bundle_routes.get(body_hash)
+        if routes is None and self.cache:
+            routes = self.cache.bundle_routes(body_hash)
+        if routes is None:
+            if body is None:
+                # Validators survived but the routes did not: fetch it in full, once
+                return self.fetch_bundle_politely(url, conditional=False)
+            routes = bundle_route_candidates(decode_body(body, response.headers.get('content-type', '')))
+            self.count_bundles('scanned')
+            if self.cache:
+                self.cache.put_bundle_routes(body_hash, routes)
+        else:
+            self.count_bundles('route_cache_hits')
+        self.bundle_routes[body_hash] = routes
+        
+        if self.cache and body is not None:
+            self.cache.put(key, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                           body_hash, [], datetime.now().strftime('%Y-%m-%d'))
+        return routes
+    
+    def enqueue_routes(self, candidates, depth):
+        """Queue valid bundle routes one level below the page that loaded the bundle"""
+        for link in self.filter_candidates(candidates, {}):
+            url = self.canonicalize(link)
+            if len(self.discovered_urls) >= self.max_urls:
+                break
+            if url not in self.discovered_urls and self.enqueue(link, depth=depth + 1, canonical=url):
+                self.count_bundles('new_urls')
+    
+    def extract_links(self, url, response):
+        """Extract URLs from a page with the configured extractor backend"""
+        parsed, _, _ = self.parse_page(url, response)
+        return self.resolve_links(response.url, parsed)
+    
+    def fetch_page(self, url, stream_parse=None):
+        """Download a page (safe to call from worker threads)
+        
+        The body is streamed: status and headers are checked before it is
+        read, non-HTML bodies are never downloaded, and at most
+        `max_body_bytes` (after decompression) are kept. With `stream_parse`
+        (default: the `stream_parse` setting with the 'fast' extractor),
+        chunks are decoded incrementally and fed straight into the link
+        tokenizer as they arrive, so the body is never held in memory;
+        otherwise it is buffered, e.g. to hand it to the parse pool.
+        """
+        self.logger.info("Crawling: %s", url, extra={'event': 'fetch'})
+        if stream_parse is None:
+            stream_parse = self.stream_parse and self.extractor == 'fast'
+        
+        # Revalidate against the cache so unchanged pages come back as 304.
+        # Duplicates were cached without outlinks, and whether a page is still
+        # a copy depends on what else this run crawls: fetch and check them again
+        headers = {}
+        cached = self.cache.get(url) if self.cache else None
+        if cached and cached['duplicate_of']:
+            cached = None
+        if cached:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+        
+        start = time.perf_counter()
+        try:
+            response = self.session.get(self.page_urls.get(url, url), timeout=15, allow_redirects=True,
+                                        headers=headers, stream=True)
+        except requests.RequestException as e:
+            self.metrics.record_error(type(e).__name__)
+            raise
+        
+        timings = {}
+        body = b''
+        digest = hashlib.sha1()
+        response.cache_entry = cached
+        response.tokenizer = None
+        response.truncated = False
+        try:
+            content_type = response.headers.get('content-type', '')
+            is_html = 'text/html' in content_type.lower()
+            if response.status_code >= 400 or response.status_code == 304 or not is_html:
+                if response.status_code < 300 and not is_html:
+                    self.metrics.count('skipped_non_html')
+                # Error bodies and non-HTML are not needed; short ones are
+                # drained so the keep-alive connection can be reused
+                length = response.headers.get('content-length', '')
+                if length.isdigit() and int(length) <= 64 * 1024:
+                    for _ in response.iter_content(chunk_size=64 * 1024):
+                        pass
+            else:
+                chunks = []
+                tokenizer = decoder = None
+                if stream_parse:
+                    tokenizer = LinkTokenizer()
+                    decoder = codecs.getincrementaldecoder(body_charset(content_type))(errors='replace')
+                    timings = {'decode': 0.0, 'parse': 0.0}
+                size = 0
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    if size + len(chunk) > self.max_body_bytes:
+                        chunk = chunk[:self.max_body_bytes - size]
+                        response.truncated = True
+                    size += len(chunk)
+                    digest.update(chunk)
+                    if tokenizer is None:
+                        chunks.append(chunk)
+                    else:
+                        chunk_start = time.perf_counter()
+                        text = decoder.decode(chunk)
+                        decoded_at = time.perf_counter()
+                        tokenizer.feed(text)
+                        timings['decode'] += decoded_at - chunk_start
+                        timings['parse'] += time.perf_counter() - decoded_at
+                    if response.truncated:
+                        self.metrics.count('truncated_body')
+                        self.logger.warning("Body of %s cut off at %d bytes", url, self.max_body_bytes)
+                        break
+                if tokenizer is not None:
+                    tokenizer.feed(decoder.decode(b'', final=True))
+                    tokenizer.close()
+                    response.tokenizer = tokenizer
+                body = b''.join(chunks)
+        finally:
+            response.close()
+        response._content = body  # what requests' .content would return
+        response._content_consumed = True
+        response.body_hash = digest.hexdigest()
+        response.timings = timings
+        
+        # Time to headers (DNS, connect, server time) vs. reading the body;
+        # tokenizing while streaming is reported as parse, not fetch
+        fetch_seconds = time.perf_counter() - start - sum(timings.values())
+        headers_seconds = response.elapsed.total_seconds()
+        timings['fetch'] = fetch_seconds
+        timings['download'] = max(0.0, fetch_seconds - headers_seconds)
+        self.metrics.observe_many(timings)
+        response.wire_bytes = response.raw.tell() or 0
+        self.metrics.record_response(urlparse(url).netloc.lower(), response.status_code,
+                                     response.wire_bytes, headers_seconds)
+        
+        response.raise_for_status()
+        return response
+    
+    def needs_extraction(self, response):
+        """Whether a fetched page must be parsed (not a 304 or unchanged body)"""
+        cached = response.cache_entry
+        if response.status_code == 304 and cached is not None:
+            return False
+        if 'text/html' not in response.headers.get('content-type', '').lower():
+            return False
+        return not (cached and cached['body_hash'] == response.body_hash)
+    
+    def process_page(self, url, response, found_urls=None, signature=None):
+        """Extract links from a fetched page and update crawl state
+        
+        `found_urls` may carry links already extracted elsewhere (the parse
+        pool), with `signature` = (fingerprint, rel=canonical href) of the
+        page; otherwise the page is parsed here when needed. Duplicates of
+        pages already crawled are recorded; links of redirect sources and
+        exact or near copies are not followed, those of pages declaring
+        another canonical URL are.
+        """
+        cached = response.cache_entry
+        not_modified = response.status_code == 304 and cached is not None
+        
+        # Check content type
+        content_type = response.headers.get('content-type', '').lower()
+        if not not_modified and 'text/html' not in content_type:
+            self.log_crawl(url, 'skipped', response, content_type=content_type)
+            return False
+        
+        depth = self.url_depths.pop(url, 0)
+        duplicate = None  # (canonical URL, kind) when the page is a copy
+        bundles = set()  # same-origin script bundles to mine for routes
+        
+        # Handle redirects; the page is published where it is served
+        served_url = clean_url(response.url)
+        if served_url != url:
+            self.page_urls[url] = served_url
+        else:
+            self.page_urls.pop(url, None)
+        final_url = self.canonicalize(response.url)
+        if final_url != url and self.is_valid_url(response.url):
+            self.enqueue(served_url, depth=depth, canonical=final_url)
+            if self.dedupe != 'off':
+                duplicate = (final_url, 'redirect')
+        
+        if not_modified:
+            # Unchanged since last run: reuse cached outlinks without parsing
+            duplicate = duplicate or self.find_duplicate(url, cached['body_hash'])
+            found_urls, bundles = self.split_bundles(set() if duplicate else set(cached['outlinks']))
+            found_urls = self.canonical_links(found_urls)
+            if not duplicate:
+                self.content_index.add(url, cached['body_hash'])
+            entry = cached
+        else:
+            body_hash = response.body_hash
+            duplicate = duplicate or self.find_duplicate(url, body_hash)
+            if duplicate:
+                # Same body as a page already crawled: skip extraction
+                found_urls = {}
+                changed_at = datetime.now().strftime('%Y-%m-%d')
+            elif not self.needs_extraction(response):
+                found_urls, bundles = self.split_bundles(set(cached['outlinks']))
+                found_urls = self.canonical_links(found_urls)
+                changed_at = cached['changed_at']
+                self.content_index.add(url, body_hash)
             else:
-                # Handle regular sitemap files
-                for url_elem in root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}url'):
-                    loc = url_elem.find('{http://www.sitemaps.org/schemas/sitemap/0.9}loc')
-                    if loc is not None and loc.text:
-                        urls.append(loc.text)
+                # Parse content; links are only resolved if they will be followed
+                parsed = None
+                if found_urls is None:
+                    parsed, fingerprint, canonical_href = self.parse_page(url, response)
+                else:
+                    fingerprint, canonical_href = signature or (None, None)
+                duplicate = self.find_duplicate(url, body_hash, fingerprint, canonical_href, response.url)
+                if duplicate and duplicate[1] == 'near':
+                    # Near duplicate: its links are not followed
+                    found_urls = {}
+                else:
+                    # A declared copy (e.g. a paginated listing naming page 1
+                    # as canonical) still links to pages of its own
+                    if parsed is not None:
+                        found_urls = self.resolve_links(response.url, parsed)
+                        response.script_sources = self.script_sources(parsed)
+                    found_urls = self.canonical_links(found_urls)
+                    bundles = self.bundle_urls(response.url, getattr(response, 'script_sources', ()))
+                    if not duplicate:
+                        self.content_index.add(url, body_hash, fingerprint)
+                changed_at = datetime.now().strftime('%Y-%m-%d')
             
-            self.logger.info(f"Extracted {len(urls)} URLs from sitemap: {sitemap_url}")
-            return urls
-            
-        except Exception as e:
-            self.logger.error(f"Error parsing sitemap {sitemap_url}: {e}")
-            return []
+            entry = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'changed_at': changed_at,
+            }
+            if self.cache:
+                # Bundles are cached with the outlinks (split_bundles tells them apart)
+                self.cache.put(url, entry['etag'], entry['last_modified'],
+                               body_hash, set(found_urls.values()) | bundles, changed_at,
+                               duplicate[0] if duplicate else None)
+        
+        if duplicate:
+            self.record_duplicate(url, *duplicate, depth=depth)
+        
+        lastmod = lastmod_date(entry)
+        if lastmod:
+            self.lastmod_dates[url] = lastmod
+        
+        # Bundles not mined yet this run are fetched by the caller (off the event loop)
+        response.depth = depth
+        response.bundles = [bundle for bundle in bundles if self.canonicalize(bundle) not in self.mined_bundles]
+        
+        # Add new URLs to queue
+        new_urls = [u for u in found_urls if u not in self.discovered_urls]
+        for new_url in new_urls:
+            if len(self.discovered_urls) < self.max_urls:
+                self.enqueue(found_urls[new_url], depth=depth + 1, canonical=new_url)
+        
+        # Track how productive this part of the site is at yielding new links
+        stats = self.pattern_stats.setdefault(url_pattern(url), [0, 0])
+        stats[0] += 1
+        stats[1] += len(new_urls)
+        
+        self.crawled_urls.add(url)
+        if self.state:
+            self.state.record(url, CrawlStateStore.CRAWLED, self.lastmod_dates.get(url),
+                              self.page_urls.get(url, url))
+        if duplicate:
+            self.logger.info("≡ Duplicate (%s) of %s", duplicate[1], duplicate[0], extra={'event': 'page'})
+        else:
+            self.logger.info("✓ Found %d URLs, %d new", len(found_urls), len(new_urls),
+                             extra={'event': 'page'})
+        self.log_crawl(url, 'duplicate' if duplicate else 'not_modified' if not_modified else 'crawled',
+                       response, depth=depth, links=len(found_urls), new_links=len(new_urls),
+                       duplicate_of=duplicate[0] if duplicate else None)
+        
+        return True
     
-    def generate_potential_urls(self):
-        """Generate potential URLs based on common patterns"""
-        potential_urls = set()
+    def log_crawl(self, url, outcome, response=None, **fields):
+        """Write the per-URL crawl record to the event log (no-op when it is off)
         
-        for base_url in self.base_urls:
-            # Add common page patterns
-            common_patterns = [
-                '/jobs', '/jobs/', '/careers', '/careers/', '/vacancies', '/opportunities',
-                '/companies', '/employers', '/locations', '/departments', '/categories',
-                '/search', '/browse', '/find-jobs', '/job-search',
-                '/about', '/contact', '/privacy', '/terms', '/help', '/faq'
-            ]
-            
-            for pattern in common_patterns:
-                potential_urls.add(f"{base_url}{pattern}")
-            
-            # Generate location-based job URLs
-            for location in self.locations[:20]:  # Limit to top 20 locations
-                potential_urls.add(f"{base_url}/jobs-in-{location}")
-                potential_urls.add(f"{base_url}/jobs/{location}")
-                potential_urls.add(f"{base_url}/careers-in-{location}")
-            
-            # Generate job category URLs
-            for keyword in self.job_keywords[:15]:  # Limit to top 15 keywords
-                potential_urls.add(f"{base_url}/{keyword}-jobs")
-                potential_urls.add(f"{base_url}/jobs/{keyword}")
-                potential_urls.add(f"{base_url}/{keyword}-careers")
-            
-            # Generate combined location + job type URLs
-            for keyword in self.job_keywords[:5]:  # Top 5 keywords
-                for location in self.locations[:5]:  # Top 5 locations
-                    potential_urls.add(f"{base_url}/{keyword}-jobs-in-{location}")
+        Outcomes: crawled, not_modified, duplicate, skipped (not HTML),
+        retry and failed. Fetched pages add status, wire bytes and
+        per-stage timings in milliseconds.
+        """
+        if not self.events.isEnabledFor(logging.INFO):
+            return
+        fields['url'] = url
+        fields['outcome'] = outcome
+        if self.site_name:
+            fields['site'] = self.site_name
+        if response is not None:
+            fields['status'] = response.status_code
+            fields['bytes'] = getattr(response, 'wire_bytes', None)
+            fields['truncated'] = getattr(response, 'truncated', False)
+            for stage, seconds in getattr(response, 'timings', {}).items():
+                fields[f'{stage}_ms'] = round(seconds * 1000, 2)
+        self.events.info("%s %s", outcome, url, extra={'event': 'crawl', 'fields': fields})
+    
+    def canonical_links(self, links):
+        """{canonical URL: URL as linked} for a page's outlinks"""
+        with self.metrics.timer('canonicalize'):
+            canonical = {}
+            for link in links:
+                canonical.setdefault(self.canonicalize(link), link)
+        return canonical
+    
+    def find_duplicate(self, url, body_hash, fingerprint=None, canonical_href=None, page_url=None):
+        """(canonical URL, kind) if the page copies another page, else None
         
-        return potential_urls
+        kind is 'canonical_tag' (the page names another URL in <link
+        rel="canonical">), 'exact' (same body as a crawled page) or 'near'
+        (content fingerprint, which ignores template blocks, within
+        `near_duplicate_distance` bits).
+        """
+        if self.dedupe == 'off':
+            return None
+        if canonical_href:
+            target = self.canonicalize(urljoin(page_url or url, canonical_href))
+            # Ignore tags pointing off-site or back at a page that names us
+            if target != url and self.is_valid_url(target) and self.duplicate_of.get(target) != url:
+                return target, 'canonical_tag'
+        other = self.content_index.find_exact(body_hash)
+        if other is not None and other != url:
+            return other, 'exact'
+        other = self.content_index.find_near(fingerprint)
+        if other is not None and other != url:
+            return other, 'near'
+        return None
     
-    def is_valid_url(self, url):
-        """Enhanced URL validation"""
-        try:
-            parsed = urlparse(url)
-            
-            # Basic validation
-            if parsed.scheme not in ['http', 'https']:
-                return False
-            
-            # Check domain
-            base_domains = ['finploy.com', 'finploy.co.uk']
-            if not any(domain in parsed.netloc for domain in base_domains):
-                return False
-            
-            # Skip certain file types
-            skip_extensions = ['.pdf', '.jpg', '.jpeg', '.png', '.gif', '.css', '.js', 
-                             '.ico', '.xml', '.txt', '.zip', '.doc', '.docx']
-            if any(url.lower().endswith(ext) for ext in skip_extensions):
-                return False
-            
-            # Skip URLs that are too long (likely generated)
-            if len(url) > 300:
-                return False
-            
-            # Skip obvious spam/bot URLs
-            spam_indicators = ['wp-admin', 'wp-content', 'admin', 'login', 'register']
-            if any(indicator in url.lower() for indicator in spam_indicators):
-                return False
-            
-            return True
-            
-        except Exception:
+    def cluster_root(self, url):
+        """Representative URL of a page's duplicate cluster"""
+        seen = set()
+        while url in self.duplicate_of and url not in seen:
+            seen.add(url)
+            url = self.duplicate_of[url]
+        return url
+    
+    def record_duplicate(self, url, canonical, kind, depth=0):
+        """Record `url` as a copy of `canonical`
+        
+        Redirect sources and pages with a rel=canonical tag defer to the URL
+        the site names, which is queued for crawling. Within content
+        clusters the representative is the cleanest URL seen (no query
+        string, then shortest), so '/' wins over '/index.php?ref=nav'.
+        """
+        self.duplicate_stats[kind] += 1
+        if kind in ('redirect', 'canonical_tag'):
+            self.enqueue(canonical, depth=depth)
+            self.duplicate_of[url] = canonical
+            return
+        root = self.cluster_root(canonical)
+        if ('?' in url, len(url)) < ('?' in root, len(root)):
+            self.duplicate_of[root] = url
+        else:
+            self.duplicate_of[url] = root
+    
+    def duplicate_clusters(self):
+        """{canonical URL: [duplicate URLs]} for every cluster with copies"""
+        clusters = {}
+        for url in self.duplicate_of:
+            clusters.setdefault(self.cluster_root(url), []).append(url)
+        return clusters
+    
+    def canonicalize(self, url):
+        """Canonical form of a URL under this crawl's alias rules"""
+        return canonicalize_url(url, self.alias_rules)
+    
+    def score_url(self, url, depth=0, lastmod=None, sitemap_priority=None):
+        """Frontier score of a URL (lower is crawled first)
+        
+        Dominated by the get_url_priority class, then shallower pages,
+        sections that have yielded many new links, and the priority and
+        freshness the site's own sitemap declares.
+        """
+        score = 10.0 * self.get_url_priority(url) + 2.0 * min(depth, 10)
+        
+        pages, new_links = self.pattern_stats.get(url_pattern(url), (0, 0))
+        score -= 3.0 * math.log1p((new_links + 1) / (pages + 1))
+        
+        if sitemap_priority is not None:
+            score -= 5.0 * min(max(sitemap_priority, 0.0), 1.0)
+        if lastmod:
+            try:
+                age = datetime.now() - datetime.strptime(lastmod[:10], '%Y-%m-%d')
+                if age.days <= 30:
+                    score -= 2.0
+            except ValueError:
+                pass
+        return score
+    
+    def enqueue(self, url, depth=0, lastmod=None, sitemap_priority=None, canonical=None):
+        """Add a newly discovered URL to the frontier
+        
+        The frontier and seen-sets are keyed by the canonical form
+        (`canonical`, if the caller has it already); the URL as linked,
+        minus fragment and tracking parameters, is what gets fetched.
+        """
+        link = clean_url(url)
+        url = canonical or self.canonicalize(url)
+        if self.exchange is not None and not self.exchange.owns(url):
+            # Distributed mode: another worker's partition crawls this one
+            return self.exchange.forward(url, depth, lastmod, sitemap_priority, link)
+        if url in self.discovered_urls:
             return False
+        self.discovered_urls.add(url)
+        if link != url:
+            self.page_urls[url] = link
+        score = self.score_url(url, depth, lastmod, sitemap_priority) if self.frontier == 'priority' else 0
+        self.url_queue.push(url, score)
+        if depth:
+            self.url_depths[url] = depth
+        if self.state:
+            self.state.record(url, CrawlStateStore.QUEUED, location=self.page_urls.get(url))
+        return True
     
-    def extract_urls_comprehensive(self, url, soup):
-        """Comprehensive URL extraction"""
-        urls = set()
+    def mark_failed(self, url):
+        self.url_depths.pop(url, None)
+        self.failed_urls.add(url)
+        if self.state:
+            self.state.record(url, CrawlStateStore.FAILED)
+    
+    def throttle_for(self, url):
+        """Adaptive throttle of the URL's host"""
+        host = urlparse(url).netloc.lower()
+        throttle = self.throttles.get(host)
+        if throttle is None:
+            if self.exchange is not None and self.exchange.partition is not None:
+                # Distributed worker: other workers crawl this host too
+                throttle = SharedHostThrottle(self.exchange.broker, host, self.per_host_concurrency, self.delay)
+            else:
+                throttle = HostThrottle(self.per_host_concurrency, self.delay)
+            self.throttles[host] = throttle
+        return throttle
+    
+    def sleep(self, seconds):
+        """time.sleep that keeps a distributed worker's heartbeat fresh
         
-        # Extract all anchor links
-        for link in soup.find_all('a', href=True):
-            href = link['href'].strip()
-            if href and not href.startswith(('#', 'mailto:', 'tel:', 'javascript:')):
-                full_url = urljoin(url, href).split('#')[0]
-                if self.is_valid_url(full_url):
-                    urls.add(full_url)
+        A long Retry-After would otherwise look like a dead worker to the
+        coordinator, which gives up on stale partitions.
+        """
+        exchange = self.exchange
+        if exchange is None or exchange.partition is None:
+            time.sleep(seconds)
+            return
+        deadline = time.monotonic() + seconds
+        while (remaining := deadline - time.monotonic()) > 0:
+            time.sleep(min(remaining, SQLiteBroker.HEARTBEAT_INTERVAL))
+            exchange.broker.touch(exchange.partition)
+    
+    def record_success(self, url, response):
+        self.throttle_for(url).on_success(response.elapsed.total_seconds())
+        if self.retry_attempts.pop(url, None):
+            self.retry_stats['recovered'] += 1
+    
+    def classify_failure(self, url, error):
+        """(transient, Retry-After seconds) of a failed request
         
-        # Look for URLs in various attributes
-        url_attributes = ['data-href', 'data-url', 'data-link', 'href']
-        for attr in url_attributes:
-            for elem in soup.find_all(attrs={attr: True}):
-                href = elem[attr]
-                if href and isinstance(href, str):
-                    full_url = urljoin(url, href).split('#')[0]
-                    if self.is_valid_url(full_url):
-                        urls.add(full_url)
+        Backs off the host on 429/503 and timeouts.
+        """
+        status = None
+        retry_after = None
+        response = getattr(error, 'response', None)
+        if response is not None:
+            status = response.status_code
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        transient = status in TRANSIENT_STATUSES or (
+            status is None and isinstance(error, (requests.ConnectionError, requests.Timeout)))
         
-        # Enhanced JavaScript parsing
-        for script in soup.find_all('script'):
-            if script.string:
-                script_content = script.string
-                
-                # Multiple patterns for URL extraction
-                patterns = [
-                    r'"((?:https?://)?[^"]*(?:job|career|company|location|department)[^"]*)"',
-                    r"'((?:https?://)?[^']*(?:job|career|company|location|department)[^']*)'",
-                    r'url:\s*["\'](/?[^"\']+)["\']',
-                    r'href:\s*["\'](/?[^"\']+)["\']',
-                    r'link:\s*["\'](/?[^"\']+)["\']',
-                    r'path:\s*["\'](/?[^"\']+)["\']'
-                ]
-                
-                for pattern in patterns:
-                    matches = re.findall(pattern, script_content, re.IGNORECASE)
-                    for match in matches[:10]:  # Limit matches per script
-                        if match.startswith('//'):
-                            continue
-                        full_url = urljoin(url, match).split('#')[0]
-                        if self.is_valid_url(full_url):
-                            urls.add(full_url)
+        if status in (429, 503) or isinstance(error, requests.Timeout):
+            self.throttle_for(url).back_off(retry_after)
+        return transient, retry_after
+    
+    def retry_delay(self, attempt, retry_after=None):
+        """Exponential backoff with jitter, never before the host's pause ends"""
+        backoff = self.retry_backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+        return max(backoff, retry_after or 0)
+    
+    def handle_failure(self, url, error):
+        """Back off the host and retry transient failures; others fail for good"""
+        response = getattr(error, 'response', None)
+        transient, retry_after = self.classify_failure(url, error)
         
-        return urls
+        attempt = self.retry_attempts.get(url, 0) + 1
+        if transient and attempt <= self.max_retries:
+            self.retry_attempts[url] = attempt
+            due = time.monotonic() + self.retry_delay(attempt, retry_after)
+            heapq.heappush(self.retry_queue, (due, next(self.retry_sequence), url))
+            self.retry_stats['scheduled'] += 1
+            self.logger.warning("↻ Retry %d/%d in %.1fs for %s: %s", attempt, self.max_retries,
+                                due - time.monotonic(), url, error)
+            self.log_crawl(url, 'retry', response, attempt=attempt, error=str(error))
+            return
+        
+        if transient:
+            self.retry_stats['exhausted'] += 1
+        self.retry_attempts.pop(url, None)
+        self.logger.error("✗ Failed to crawl %s: %s", url, error)
+        self.log_crawl(url, 'failed', response, attempt=attempt, error=str(error))
+        self.mark_failed(url)
+    
+    def due_retry(self):
+        """Pop the next retry whose backoff has elapsed, or None"""
+        if self.retry_queue and self.retry_queue[0][0] <= time.monotonic():
+            return heapq.heappop(self.retry_queue)[2]
+        return None
     
     def crawl_page(self, url):
         """Enhanced page crawling"""
         try:
-            self.logger.info(f"Crawling: {url}")
+            response = self.fetch_page(url)
+            self.record_success(url, response)
+            crawled = self.process_page(url, response)
+            if crawled and response.bundles:
+                self.enqueue_routes(self.mine_script_bundles(response.bundles), response.depth)
+            return crawled
             
-            response = self.session.get(url, timeout=15, allow_redirects=True)
-            response.raise_for_status()
-            
-            # Check content type
-            content_type = response.headers.get('content-type', '').lower()
-            if 'text/html' not in content_type:
-                return False
-            
-            # Handle redirects
-            if response.url != url and self.is_valid_url(response.url):
-                if response.url not in self.discovered_urls:
-                    self.discovered_urls.add(response.url)
-                    self.url_queue.append(response.url)
-            
-            # Parse content
-            soup = BeautifulSoup(response.content, 'html.parser')
-            found_urls = self.extract_urls_comprehensive(url, soup)
-            
-            # Add new URLs to queue
-            new_urls = found_urls - self.discovered_urls
-            for new_url in new_urls:
-                if len(self.discovered_urls) < self.max_urls:
-                    self.url_queue.append(new_url)
-                    self.discovered_urls.add(new_url)
-            
-            self.crawled_urls.add(url)
-            self.logger.info(f"✓ Found {len(found_urls)} URLs, {len(new_urls)} new")
-            
-            return True
+        except Exception as e:
+            self.handle_failure(url, e)
+            return False
+    
+    async def crawl_page_async(self, url, executor, parse_pool=None, parse_slots=None):
+        """Async crawl: fetch on a worker thread, process on the event loop
+        
+        With a parse pool, raw bytes are handed to a worker process for link
+        extraction; `parse_slots` bounds the jobs queued on the pool, so
+        fetchers wait (backpressure) when parsing falls behind.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            # Bodies bound for the parse pool are buffered rather than tokenized in-thread
+            response = await loop.run_in_executor(executor, self.fetch_page, url,
+                                                  None if parse_pool is None else False)
+            self.record_success(url, response)
+            found_urls = None
+            signature = None
+            if (parse_pool and self.needs_extraction(response)
+                    and not self.find_duplicate(url, response.body_hash)):
+                async with parse_slots:
+                    candidates, fingerprint, canonical_href, script_sources, timings = (
+                        await loop.run_in_executor(
+                            parse_pool, parse_page_worker, response.url, response.content,
+                            response.headers.get('content-type', ''), self.dedupe == 'near'
+                        )
+                    )
+                found_urls = self.filter_candidates(candidates, timings)
+                signature = (fingerprint, canonical_href)
+                response.script_sources = script_sources
+            crawled = self.process_page(url, response, found_urls, signature)
+            if crawled and response.bundles:
+                # Bundle fetches block, so they run on the fetch threads
+                routes = await loop.run_in_executor(executor, self.mine_script_bundles, response.bundles)
+                self.enqueue_routes(routes, response.depth)
+            return crawled
             
         except Exception as e:
-            self.logger.error(f"✗ Failed to crawl {url}: {e}")
-            self.failed_urls.add(url)
+            self.handle_failure(url, e)
             return False
     
+    def probe_url(self, url):
+        """Status code of a URL (HEAD, or headers-only GET if HEAD is refused)"""
+        with self.metrics.timer('probe'):
+            return self.probe_status(url)
+    
+    def probe_status(self, url):
+        try:
+            response = self.session.head(url, timeout=5, allow_redirects=True)
+            if response.status_code in (403, 405, 501):
+                # Some servers reject HEAD; fetch headers only and drop the body
+                with self.session.get(url, timeout=5, allow_redirects=True, stream=True) as response:
+                    pass
+            return response.status_code
+        except Exception:
+            return None
+    
     def test_potential_urls(self, potential_urls):
-        """Test potential URLs to see if they exist"""
+        """Test potential URLs to see if they exist
+        
+        `potential_urls` is a {template: [urls]} dict (or a plain collection,
+        probed without pruning). Probes run concurrently, round-robin across
+        templates; a template is abandoned after `probe_miss_limit`
+        consecutive misses, and URLs that returned 404/410 within
+        `negative_cache_ttl` seconds are skipped without a request.
+        """
+        if isinstance(potential_urls, dict):
+            templates = {template: deque(urls) for template, urls in potential_urls.items() if urls}
+        else:
+            templates = {None: deque(potential_urls)} if potential_urls else {}
+        total = sum(len(urls) for urls in templates.values())
         valid_urls = set()
+        misses = Counter()
+        pruned = set()
+        skipped = 0
+        tested = 0
         
-        self.logger.info(f"Testing {len(potential_urls)} potential URLs...")
+        self.logger.info(f"Testing {total} potential URLs...")
         
-        for i, url in enumerate(potential_urls):
-            if i % 50 == 0:  # Progress update
-                print(f"\r🔍 Testing potential URLs: {i}/{len(potential_urls)}", end="")
-            
-            try:
-                # Quick HEAD request to check if URL exists
-                response = self.session.head(url, timeout=5, allow_redirects=True)
-                if response.status_code in [200, 301, 302]:
-                    valid_urls.add(url)
-                    if len(valid_urls) >= 500:  # Limit valid URLs to test
-                        break
-            except:
-                continue
-            
-            time.sleep(0.1)  # Small delay
+        def record_miss(template):
+            misses[template] += 1
+            if template is not None and misses[template] >= self.probe_miss_limit and template not in pruned:
+                pruned.add(template)
+                self.logger.info(f"✂️ Pruned probe template after {misses[template]} misses: {template}")
+        
+        executor = ThreadPoolExecutor(max_workers=self.probe_concurrency)
+        in_flight = {}
+        rotation = deque(templates)
+        try:
+            while len(valid_urls) < 500:  # Limit valid URLs to test
+                # Fill free slots round-robin across live templates
+                while len(in_flight) < self.probe_concurrency and rotation:
+                    template = rotation.popleft()
+                    urls = templates[template]
+                    if template in pruned or not urls:
+                        skipped += len(urls) if template in pruned else 0
+                        urls.clear()
+                        continue
+                    url = urls.popleft()
+                    rotation.append(template)
+                    if self.cache and self.cache.recent_miss(url, self.negative_cache_ttl):
+                        skipped += 1
+                        record_miss(template)
+                        continue
+                    in_flight[executor.submit(self.probe_url, url)] = (template, url)
+                
+                if not in_flight:
+                    break
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    template, url = in_flight.pop(future)
+                    status = future.result()
+                    tested += 1
+                    if tested % 50 == 0:  # Progress update
+                        print(f"\r🔍 Testing potential URLs: {tested}/{total}", end="")
+                    if status is not None and self.cache:
+                        self.cache.record_probe(url, status)
+                    if status in [200, 301, 302]:
+                        valid_urls.add(url)
+                        misses[template] = 0
+                    else:
+                        record_miss(template)
+        finally:
+            executor.shutdown(wait=False)
+            if self.cache:
+                self.cache.flush()
         
-        print(f"\r🔍 Found {len(valid_urls)} valid URLs from {len(potential_urls)} tested")
+        print(f"\r🔍 Found {len(valid_urls)} valid URLs from {tested} tested "
+              f"({skipped} skipped, {len(pruned)} templates pruned)")
         return valid_urls
     
-    def generate_enhanced_sitemap(self):
-        """Enhanced sitemap generation"""
-        self.logger.info("🚀 Starting Enhanced Finploy Sitemap Generation")
-        
+    def seed_frontier(self):
+        """Seed the frontier from sitemaps, base URLs and probed guesses"""
         # Step 1: Check existing sitemaps
         existing_sitemaps = self.check_existing_sitemaps()
-        for sitemap_url in existing_sitemaps:
-            sitemap_urls = self.parse_sitemap(sitemap_url)
-            for sitemap_url in sitemap_urls:
-                if self.is_valid_url(sitemap_url):
-                    self.discovered_urls.add(sitemap_url)
-                    self.url_queue.append(sitemap_url)
+        for loc, lastmod, priority in self.ingest_sitemaps(existing_sitemaps):
+            if self.is_valid_url(loc) and self.enqueue(loc, lastmod=lastmod, sitemap_priority=priority) and lastmod:
+                # Until the page is crawled, trust the sitemap's own lastmod
+                self.lastmod_dates[self.canonicalize(loc)] = lastmod[:10]
         
         # Step 2: Add base URLs
         for base_url in self.base_urls:
-            self.discovered_urls.add(base_url)
-            self.url_queue.append(base_url)
+            self.enqueue(base_url)
         
         # Step 3: Generate and test potential URLs
-        potential_urls = self.generate_potential_urls()
+        potential_urls = self.generate_probe_candidates()
         valid_urls = self.test_potential_urls(potential_urls)
         
         for url in valid_urls:
-            if url not in self.discovered_urls:
-                self.discovered_urls.add(url)
-                self.url_queue.append(url)
+            self.enqueue(url)
+    
+    def resume_from_checkpoint(self):
+        """Rebuild crawl state from the last checkpoint; returns False if none"""
+        for url, state, lastmod, location in self.state.load():
+            self.discovered_urls.add(url)
+            if location and location != url:
+                self.page_urls[url] = location
+            if state == CrawlStateStore.CRAWLED:
+                self.crawled_urls.add(url)
+                if lastmod:
+                    self.lastmod_dates[url] = lastmod
+            elif state == CrawlStateStore.FAILED:
+                self.failed_urls.add(url)
+            else:
+                self.url_queue.push(url, self.score_url(url))
+        return bool(self.discovered_urls)
+    
+    def checkpoint(self):
+        """Flush crawl state and cache to disk"""
+        if self.state:
+            self.state.checkpoint()
+        if self.cache:
+            self.cache.flush()
+    
+    def generate_enhanced_sitemap(self, resume=False):
+        """Enhanced sitemap generation"""
+        self.logger.info("🚀 Starting Enhanced Finploy Sitemap Generation")
+        
+        if resume and self.state and self.resume_from_checkpoint():
+            self.logger.info(f"♻️ Resuming crawl: {len(self.crawled_urls)} crawled, {len(self.url_queue)} queued")
+            for base_url in self.base_urls:
+                self.read_robots(f"{base_url}/robots.txt")  # Crawl-delay
+        else:
+            if self.state:
+                self.state.reset()
+            self.seed_frontier()
         
         self.logger.info(f"Starting crawl with {len(self.discovered_urls)} seed URLs")
         
         # Step 4: Crawl pages
-        crawled_count = 0
-        while self.url_queue and crawled_count < self.max_urls:
-            url = self.url_queue.popleft()
+        if self.crawl_mode == 'async':
+            asyncio.run(self.crawl_async())
+        else:
+            self.crawl_sync()
+        
+        print()  # New line
+        self.checkpoint()
+        elapsed = (time.time() - self.start_time) / 60
+        self.logger.info(f"🏁 Enhanced crawling complete in {elapsed:.1f} minutes")
+        self.logger.info(f"📊 Final stats - Discovered: {len(self.discovered_urls)}, Crawled: {len(self.crawled_urls)}, Failed: {len(self.failed_urls)}")
+        
+        return self.discovered_urls
+    
+    async def generate_site_async(self, gzip_shards=False):
+        """Multi-site mode: crawl this site on a shared event loop, then write
+        its sitemap and report; returns the report"""
+        self.logger.info("🚀 Starting site crawl")
+        if self.state:
+            self.state.reset()
+        # Seeding blocks (sitemaps, probes); keep the other sites crawling meanwhile
+        await asyncio.to_thread(self.seed_frontier)
+        self.logger.info(f"Starting crawl with {len(self.discovered_urls)} seed URLs")
+        try:
+            await self.crawl_async()
+        finally:
+            self.checkpoint()
+        self.logger.info(f"📊 Final stats - Discovered: {len(self.discovered_urls)}, Crawled: {len(self.crawled_urls)}, Failed: {len(self.failed_urls)}")
+        await asyncio.to_thread(self.create_sitemap_xml, self.discovered_urls, gzip_shards=gzip_shards)
+        return await asyncio.to_thread(self.generate_report)
+    
+    def has_work(self):
+        """Whether URLs are waiting to be crawled within the page budget"""
+        return bool(self.url_queue or self.retry_queue) and len(self.crawled_urls) < self.max_urls
+    
+    def exchange_links(self, force=False, allow_idle=False):
+        """Distributed mode: send forwarded links and take in this partition's
+        
+        Runs at most once a second unless forced (no-op outside worker
+        mode). The worker reports idle only when `allow_idle` is set and it
+        has nothing left to crawl after taking in new links.
+        """
+        exchange = self.exchange
+        if exchange is None or exchange.partition is None:
+            return 0
+        now = time.monotonic()
+        if not force and now - exchange.last_exchange < 1.0:
+            return 0
+        exchange.last_exchange = now
+        
+        # Send first: a worker must never look idle with links still unsent
+        exchange.flush()
+        received = 0
+        for url, depth, lastmod, priority in exchange.broker.receive(exchange.partition):
+            if len(self.discovered_urls) >= self.max_urls:
+                continue  # page budget spent
+            if self.enqueue(url, depth or 0, lastmod, priority):
+                received += 1
+                if lastmod:
+                    self.lastmod_dates[self.canonicalize(url)] = lastmod[:10]
+        exchange.broker.heartbeat(exchange.partition, len(self.crawled_urls), len(self.discovered_urls),
+                                  idle=allow_idle and not self.has_work())
+        return received
+    
+    def run_worker(self, broker, partition, partitions, partition_by='url', poll_interval=0.2):
+        """Distributed mode: crawl one partition until the coordinator ends the crawl
+        
+        Links found for other partitions are forwarded through the broker,
+        and links for this one arrive the same way. When nothing is left to
+        crawl the worker reports idle and polls for new links. Once the
+        coordinator declares the crawl finished, the worker publishes its
+        pages and stats for the coordinator to merge.
+        """
+        self.exchange = LinkExchange(broker, partition, partitions, partition_by)
+        self.logger.info(f"👷 Worker {partition + 1}/{partitions} started (partitioned by {partition_by})")
+        for base_url in self.base_urls:
+            self.read_robots(f"{base_url}/robots.txt")  # Crawl-delay
+        
+        try:
+            while True:
+                self.exchange_links(force=True, allow_idle=True)
+                if self.has_work():
+                    if self.crawl_mode == 'async':
+                        asyncio.run(self.crawl_async())
+                    else:
+                        self.crawl_sync()
+                    continue
+                if broker.finished():
+                    break
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            self.logger.info(f"⏹️ Worker {partition + 1} stopped, publishing partial results")
+        
+        self.checkpoint()
+        self.exchange.flush()
+        
+        def pages():
+            for url in self.discovered_urls:
+                if url in self.crawled_urls:
+                    state = CrawlStateStore.CRAWLED
+                elif url in self.failed_urls:
+                    state = CrawlStateStore.FAILED
+                else:
+                    state = CrawlStateStore.QUEUED
+                yield (url, state, self.lastmod_dates.get(url), self.duplicate_of.get(url),
+                       self.page_urls.get(url))
+        
+        broker.publish(partition, pages(), {
+            'crawled': len(self.crawled_urls),
+            'discovered': len(self.discovered_urls),
+            'failed': len(self.failed_urls),
+            'forwarded': self.exchange.sent,
+            'url_rejections': dict(self.url_filter.rejections),
+            'retries': dict(self.retry_stats),
+            'duplicates': dict(self.duplicate_stats),
+            'host_throttles': {
+                host: {'concurrency': throttle.concurrency, 'delay': round(throttle.delay, 2)}
+                for host, throttle in self.throttles.items()
+            },
+            'metrics': self.metrics.snapshot(),
+        })
+        self.logger.info(f"👷 Worker {partition + 1}/{partitions} done: {len(self.crawled_urls)} crawled")
+    
+    def run_coordinator(self, broker, partitions, partition_by='url', worker_settings=None,
+                        stale_after=300):
+        """Distributed mode: seed the crawl, wait for the workers, merge their results
+        
+        Seeds (sitemaps, base URLs, probed guesses) are routed to their
+        partitions through the broker. With `worker_settings` (one settings
+        dict per partition), a local worker process per partition is started; otherwise workers are
+        expected to be started separately against the same broker. The
+        crawl ends when every worker is idle and no links are in flight.
+        """
+        self.logger.info(f"🚀 Starting distributed crawl over {partitions} partitions (by {partition_by})")
+        broker.reset(partitions)
+        self.exchange = LinkExchange(broker, None, partitions, partition_by)
+        self.seed_frontier()
+        self.exchange.flush()
+        self.logger.info(f"Seeded {self.exchange.sent} URLs")
+        
+        processes = []
+        if worker_settings is not None:
+            context = multiprocessing.get_context('spawn')
+            for partition in range(partitions):
+                process = context.Process(target=run_crawl_worker, name=f"crawl-worker-{partition}",
+                                          args=(worker_settings[partition], broker.path, partition,
+                                                partitions, partition_by, logging_options()))
+                process.start()
+                processes.append(process)
+        
+        try:
+            while not broker.quiescent():
+                dead = [p.name for p in processes if not p.is_alive()]
+                stale = broker.stale_workers(stale_after)
+                if dead or stale:
+                    self.logger.error(f"Workers stopped responding ({dead or stale}); merging partial results")
+                    break
+                crawled, discovered = broker.progress()
+                elapsed = (time.time() - self.start_time) / 60
+                print(f"\r🔄 Progress: {crawled} crawled, {discovered} total URLs, {elapsed:.1f}min", end="")
+                time.sleep(1)
+            print()
+        finally:
+            # Also reached on Ctrl+C: workers publish what they have
+            broker.finish()
+            deadline = time.monotonic() + 60
+            while (len(broker.published()) < partitions and time.monotonic() < deadline
+                   and (not processes or any(p.is_alive() for p in processes))):
+                time.sleep(0.2)
+            for process in processes:
+                process.join(timeout=5)
+            self.merge_results(broker)
+        
+        self.logger.info(f"📊 Final stats - Discovered: {len(self.discovered_urls)}, Crawled: {len(self.crawled_urls)}, Failed: {len(self.failed_urls)}")
+        return self.discovered_urls
+    
+    def merge_results(self, broker):
+        """Fold the workers' published pages and stats into this generator"""
+        for url, state, lastmod, duplicate_of, location in broker.pages():
+            self.discovered_urls.add(url)
+            if location:
+                self.page_urls[url] = location
+            if state == CrawlStateStore.CRAWLED:
+                self.crawled_urls.add(url)
+            elif state == CrawlStateStore.FAILED:
+                self.failed_urls.add(url)
+            if lastmod:
+                self.lastmod_dates[url] = lastmod
+            if duplicate_of:
+                self.duplicate_of[url] = duplicate_of
+        
+        for partition, summary in broker.summaries():
+            self.metrics.merge(summary.pop('metrics'))
+            self.url_filter.rejections.update(summary['url_rejections'])
+            self.retry_stats.update(summary['retries'])
+            self.duplicate_stats.update(summary['duplicates'])
+            self.worker_summaries.append(dict(summary, partition=partition))
+    
+    def print_progress(self, crawled_count):
+        """Progress update"""
+        elapsed = (time.time() - self.start_time) / 60
+        site = f"[{self.site_name}] " if self.site_name else ""
+        print(f"\r🔄 {site}Progress: {crawled_count} crawled, {len(self.discovered_urls)} total URLs, {elapsed:.1f}min", end="")
+    
+    def crawl_sync(self):
+        """Sequential crawl loop: one request at a time, paced per host"""
+        crawled_count = len(self.crawled_urls)
+        while (self.url_queue or self.retry_queue) and crawled_count < self.max_urls:
+            self.exchange_links()
+            url = self.due_retry()
+            if url is None:
+                if not self.url_queue:
+                    # Only retries left: wait for the earliest one
+                    self.sleep(max(0.0, self.retry_queue[0][0] - time.monotonic()))
+                    continue
+                url = self.url_queue.pop()
             
             if url in self.crawled_urls:
                 continue
             
+            now = time.monotonic()
+            start_at = self.throttle_for(url).reserve_start(now)
+            if start_at > now:
+                self.metrics.observe('throttle_wait', start_at - now)
+                self.sleep(start_at - now)
+            
             if self.crawl_page(url):
                 crawled_count += 1
             
             # Progress update
             if crawled_count % 50 == 0:
-                elapsed = (time.time() - self.start_time) / 60
-                print(f"\r🔄 Progress: {crawled_count} crawled, {len(self.discovered_urls)} total URLs, {elapsed:.1f}min", end="")
-            
-            time.sleep(self.delay)
+                self.print_progress(crawled_count)
         
-        print()  # New line
-        elapsed = (time.time() - self.start_time) / 60
-        self.logger.info(f"🏁 Enhanced crawling complete in {elapsed:.1f} minutes")
-        self.logger.info(f"📊 Final stats - Discovered: {len(self.discovered_urls)}, Crawled: {len(self.crawled_urls)}, Failed: {len(self.failed_urls)}")
+        return crawled_count
+    
+    async def crawl_async(self):
+        """Concurrent crawl loop with adaptive per-host politeness
         
-        return self.discovered_urls
+        Keeps up to `concurrency` requests in flight overall. Each host's
+        in-flight limit and start spacing come from its HostThrottle, so
+        different hosts are crawled in parallel and each at the rate it
+        sustains. Transient failures come back from the retry queue once
+        their backoff has elapsed.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        parse_pool = parse_slots = None
+        if self.parse_workers and self.extractor == 'fast':
+            parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+            parse_slots = asyncio.Semaphore(self.parse_workers * 2)
+        host_active = {}    # host -> requests in flight
+        host_waiting = {}   # host -> heap of (score, seq, url) parked until a slot frees
+        parked = itertools.count()
+        in_flight = {}      # task -> (url, host)
+        scheduled = set()   # URLs queued or in flight, to avoid double fetches
+        crawled_count = len(self.crawled_urls)
+        
+        async def polite_crawl(url, throttle):
+            # Reserve the next start slot for this host before sleeping
+            now = time.monotonic()
+            start_at = throttle.reserve_start(now)
+            if start_at > now:
+                self.metrics.observe('throttle_wait', start_at - now)
+                await asyncio.sleep(start_at - now)
+            return await self.crawl_page_async(url, executor, parse_pool, parse_slots)
+        
+        def has_slot(host):
+            return host_active.get(host, 0) < self.throttles[host].concurrency
+        
+        def next_url():
+            # Best URL among hosts with a free slot: the best parked one, or the
+            # frontier's next (URLs for busy hosts are parked with their score)
+            best = None
+            for host, waiting in host_waiting.items():
+                if waiting and has_slot(host) and (best is None or waiting[0] < host_waiting[best][0]):
+                    best = host
+            while True:
+                url, score = self.due_retry(), float('-inf')  # retries go first
+                if url is None:
+                    if not self.url_queue:
+                        break
+                    url, score = self.url_queue.pop_scored()
+                    if url in self.crawled_urls or url in scheduled:
+                        continue
+                host = urlparse(url).netloc.lower()
+                self.throttle_for(url)
+                scheduled.add(url)
+                entry = (score, next(parked), url)
+                if has_slot(host) and (best is None or entry < host_waiting[best][0]):
+                    return url, host
+                heapq.heappush(host_waiting.setdefault(host, []), entry)
+                if has_slot(host):
+                    break  # a parked URL beats it
+            if best is None:
+                return None, None
+            return heapq.heappop(host_waiting[best])[2], best
+        
+        share = self.share  # multi-site mode: global slots split fairly between sites
+        worker = self.exchange is not None and self.exchange.partition is not None
+        heartbeat = SQLiteBroker.HEARTBEAT_INTERVAL if worker else None
+        try:
+            while True:
+                self.exchange_links()
+                throttled = False  # waiting for a slot another site holds
+                while (len(in_flight) < self.concurrency
+                       and crawled_count + len(in_flight) < self.max_urls):
+                    if share is not None and not share.acquire(self):
+                        throttled = True
+                        break
+                    url, host = next_url()
+                    if url is None:
+                        if share is not None:
+                            share.release(self)
+                            share.idle(self)
+                        break
+                    host_active[host] = host_active.get(host, 0) + 1
+                    task = asyncio.create_task(polite_crawl(url, self.throttles[host]))
+                    in_flight[task] = (url, host)
+                
+                # Wake up for the next retry even if nothing is in flight
+                timeout = None
+                if self.retry_queue:
+                    timeout = max(0.0, self.retry_queue[0][0] - time.monotonic())
+                if throttled:
+                    # Other sites' requests free slots too: check again shortly
+                    timeout = 0.02 if timeout is None else min(timeout, 0.02)
+                if not in_flight and (timeout is None or crawled_count >= self.max_urls):
+                    break
+                if heartbeat is not None:
+                    # A distributed worker comes back to exchange_links (and its
+                    # heartbeat) even while every request waits out a long pause
+                    timeout = heartbeat if timeout is None else min(timeout, heartbeat)
+                if not in_flight:
+                    await asyncio.sleep(timeout)
+                    continue
+                
+                done, _ = await asyncio.wait(in_flight, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url, host = in_flight.pop(task)
+                    host_active[host] -= 1
+                    scheduled.discard(url)
+                    if share is not None:
+                        share.release(self)
+                    if task.result():
+                        crawled_count += 1
+                        # Progress update
+                        if crawled_count % 50 == 0:
+                            self.print_progress(crawled_count)
+        finally:
+            for task in in_flight:
+                task.cancel()
+                if share is not None:
+                    share.release(self)
+            if share is not None:
+                share.idle(self)
+            executor.shutdown(wait=False)
+            if parse_pool:
+                parse_pool.shutdown(wait=False)
+        
+        return crawled_count
     
-    def create_sitemap_xml(self, urls, filename='enhanced_sitemap.xml'):
-        """Create comprehensive XML sitemap"""
-        urlset = ET.Element('urlset')
-        urlset.set('xmlns', 'http://www.sitemaps.org/schemas/sitemap/0.9')
-        
-        # Sort URLs by priority
-        def get_url_priority(url):
-            url_lower = url.lower()
-            if any(x in url_lower for x in ['job', 'career', 'vacancy']):
-                return 1
-            elif url in self.base_urls:
-                return 2
-            elif any(x in url_lower for x in ['company', 'location', 'department']):
-                return 3
-            else:
-                return 4
+    # changefreq and priority tags for each get_url_priority class
+    PRIORITY_TAGS = {
+        1: ('daily', '0.9'),    # Job pages
+        2: ('weekly', '1.0'),   # Home pages
+        3: ('weekly', '0.7'),   # Category pages
+        4: ('monthly', '0.5'),  # Other pages
+    }
+    
+    def get_url_priority(self, url):
+        """Priority class of a URL (1 = most valuable)"""
+        url_lower = url.lower()
+        if any(x in url_lower for x in ['job', 'career', 'vacancy']):
+            return 1
+        elif url in self.home_urls:
+            return 2
+        elif any(x in url_lower for x in ['company', 'location', 'department']):
+            return 3
+        else:
+            return 4
+    
+    def known_lastmod(self, url):
+        """Modification date learned this run or cached by a previous one, else None"""
+        lastmod = self.lastmod_dates.get(url)
+        if lastmod:
+            return lastmod
+        cached = self.cache.get(url) if self.cache else None
+        return lastmod_date(cached) if cached else None
+    
+    def output_path(self, filename):
+        """Path of an output file (inside `output_dir` when one is set)"""
+        return os.path.join(self.output_dir, filename) if self.output_dir else filename
+    
+    def sitemap_urls(self, urls):
+        """(canonical URL, published URL) pairs for the sitemap
+        
+        Pages are listed as linked, or where they are served after
+        redirects, and each location once; copies are left out with
+        `exclude_duplicates`. Locations are deduplicated by fingerprint.
+        """
+        published = URLSeenSet()
+        for url in urls:
+            if self.exclude_duplicates and url in self.duplicate_of:
+                continue
+            location = self.page_urls.get(url, url)
+            if published.add(location):
+                yield url, location
+    
+    def create_sitemap_xml(self, urls, filename=None, gzip_shards=False,
+                           index_filename='sitemap_index.xml', incremental=None, partial=False):
+        """Create comprehensive XML sitemap
         
-        sorted_urls = sorted(urls, key=get_url_priority)
+        Streams entries to disk in priority order. URLs are bucketed by
+        priority class into temporary spool files instead of sorted in
+        memory, so peak memory does not grow with the number of URLs.
+        With a `sitemap_manifest` (or incremental=True) only changed shards
+        are rewritten; see publish_incremental. `partial` marks the results
+        of an interrupted crawl.
+        """
+        filename = filename or self.output_path('enhanced_sitemap.xml')
+        if incremental is None:
+            incremental = self.sitemap_manifest is not None
+        if incremental:
+            return self.publish_incremental(urls, filename, gzip_shards, index_filename, partial)
         
-        for url in sorted_urls:
-            url_elem = ET.SubElement(urlset, 'url')
-            
-            loc_elem = ET.SubElement(url_elem, 'loc')
-            loc_elem.text = url
-            
-            lastmod_elem = ET.SubElement(url_elem, 'lastmod')
-            lastmod_elem.text = datetime.now().strftime('%Y-%m-%d')
-            
-            changefreq_elem = ET.SubElement(url_elem, 'changefreq')
-            priority_elem = ET.SubElement(url_elem, 'priority')
+        write_start = time.perf_counter()
+        today = datetime.now().strftime('%Y-%m-%d')
+        
+        def get_lastmod(url):
+            return self.known_lastmod(url) or today
+        
+        # Bucket URLs by priority, preserving discovery order within a bucket
+        buckets = {priority: tempfile.TemporaryFile('w+', encoding='utf-8')
+                   for priority in self.PRIORITY_TAGS}
+        try:
+            for url, location in self.sitemap_urls(urls):
+                buckets[self.get_url_priority(url)].write(f"{location}\t{get_lastmod(url)}\n")
             
-            priority = get_url_priority(url)
-            if priority == 1:  # Job pages
-                changefreq_elem.text = 'daily'
-                priority_elem.text = '0.9'
-            elif priority == 2:  # Home pages
-                changefreq_elem.text = 'weekly'
-                priority_elem.text = '1.0'
-            elif priority == 3:  # Category pages
-                changefreq_elem.text = 'weekly'
-                priority_elem.text = '0.7'
-            else:  # Other pages
-                changefreq_elem.text = 'monthly'
-                priority_elem.text = '0.5'
-        
-        tree = ET.ElementTree(urlset)
-        ET.indent(tree, space="  ", level=0)
-        tree.write(filename, encoding='utf-8', xml_declaration=True)
-        
-        self.logger.info(f"💾 Enhanced sitemap saved: {filename} ({len(urls)} URLs)")
+            writer = SitemapWriter(filename, self.base_urls[0], gzip_shards=gzip_shards,
+                                   index_filename=index_filename)
+            for priority, bucket in buckets.items():
+                changefreq, priority_value = self.PRIORITY_TAGS[priority]
+                bucket.seek(0)
+                for line in bucket:
+                    location, lastmod = line.rstrip('\n').split('\t')
+                    writer.add(location, lastmod, changefreq, priority_value)
+            files = writer.close()
+        finally:
+            for bucket in buckets.values():
+                bucket.close()
+        self.metrics.observe('write', time.perf_counter() - write_start)
+        
+        if len(files) == 1 and files[0] == filename:
+            self.logger.info(f"💾 Enhanced sitemap saved: {filename} ({writer.total_urls} URLs)")
+        else:
+            self.logger.info(f"💾 Enhanced sitemap saved: {len(files)} shards + {writer.index_filename} ({writer.total_urls} URLs)")
+        return files
+    
+    def publish_incremental(self, urls, filename=None, gzip_shards=False,
+                            index_filename='sitemap_index.xml', partial=False):
+        """Publish stable shards, rewriting only those that changed since the last run
+        
+        Shards, the index and `sitemap_delta.jsonl` are written next to
+        `filename` (which is removed if a plain run left it there); the
+        manifest (`sitemap_manifest`) remembers each URL's shard and tags
+        for the next run. A partial publish keeps the manifest's URLs this
+        run did not reach.
+        """
+        write_start = time.perf_counter()
+        today = datetime.now().strftime('%Y-%m-%d')
+        filename = os.path.abspath(filename or self.output_path('enhanced_sitemap.xml'))
+        directory = os.path.dirname(filename)
+        publisher = IncrementalSitemap(self.sitemap_manifest or self.output_path('enhanced_sitemap_manifest.db'),
+                                       directory, self.base_urls[0], gzip_shards=gzip_shards,
+                                       index_filename=index_filename,
+                                       single_filename=os.path.basename(filename))
+        try:
+            for url, location in self.sitemap_urls(urls):
+                changefreq, priority_value = self.PRIORITY_TAGS[self.get_url_priority(url)]
+                prefix = url_category(url) if self.shard_by == 'category' else 'shard'
+                publisher.add(location, prefix, self.known_lastmod(url), changefreq, priority_value)
+            stats = publisher.publish(today, partial=partial)
+        finally:
+            publisher.close()
+        self.metrics.observe('write', time.perf_counter() - write_start)
+        
+        self.sitemap_stats = {key: value for key, value in stats.items() if key != 'files'}
+        self.logger.info(
+            f"💾 Incremental sitemap: {stats['shards_written']}/{stats['shards']} shards rewritten, "
+            f"{stats['shards_removed']} removed ({stats['urls']} URLs; +{stats['urls_added']} "
+            f"~{stats['urls_changed']} -{stats['urls_removed']} in {stats['delta']})"
+        )
+        return stats['files']
     
     def generate_report(self):
         """Generate comprehensive report"""
@@ -437,38 +3863,249 @@ class EnhancedFinploySitemapGenerator:
         }
         
         for url in self.discovered_urls:
-            url_lower = url.lower()
-            if any(x in url_lower for x in ['job', 'vacancy', 'opening']):
-                categories['job_listings'] += 1
-            elif any(x in url_lower for x in ['company', 'employer']):
-                categories['company_pages'] += 1
-            elif any(x in url_lower for x in ['location', 'city', 'jobs-in-']):
-                categories['location_pages'] += 1
-            elif any(x in url_lower for x in ['department', 'category']):
-                categories['department_pages'] += 1
-            elif any(x in url_lower for x in ['career', 'hiring']):
-                categories['career_pages'] += 1
-            else:
-                categories['other'] += 1
+            categories[url_category(url)] += 1
         
         report = {
+            'site': self.site_name,
             'generation_time': datetime.now().isoformat(),
             'elapsed_minutes': round(elapsed, 1),
             'total_urls_discovered': len(self.discovered_urls),
             'total_urls_crawled': len(self.crawled_urls),
             'failed_urls': len(self.failed_urls),
             'success_rate': round((len(self.crawled_urls) / max(1, len(self.crawled_urls) + len(self.failed_urls)) * 100), 1),
-            'url_categories': categories
+            'url_categories': categories,
+            'url_rejections': dict(self.url_filter.rejections.most_common()),
+            'retries': {
+                'scheduled': self.retry_stats['scheduled'],
+                'recovered': self.retry_stats['recovered'],
+                'exhausted': self.retry_stats['exhausted']
+            },
+            'host_throttles': {
+                host: {'concurrency': throttle.concurrency, 'delay': round(throttle.delay, 2)}
+                for host, throttle in self.throttles.items()
+            },
+            'duplicates': {
+                'pages': len(self.duplicate_of),
+                'by_kind': dict(self.duplicate_stats),
+                'excluded_from_sitemap': self.exclude_duplicates,
+                'clusters': dict(sorted(self.duplicate_clusters().items(),
+                                        key=lambda item: -len(item[1]))[:100])
+            },
+            'script_bundles': {
+                'mined': len(self.mined_bundles),
+                'distinct_bodies': len(self.bundle_routes),
+                **self.bundle_stats
+            },
+            'performance': self.metrics.to_dict()
         }
+        if self.worker_summaries:
+            report['workers'] = self.worker_summaries
+        if self.sitemap_stats:
+            report['incremental_sitemap'] = self.sitemap_stats
         
-        with open('enhanced_sitemap_report.json', 'w') as f:
+        with open(self.output_path('enhanced_sitemap_report.json'), 'w') as f:
             json.dump(report, f, indent=2)
+        if self.metrics_file:
+            self.metrics.write_prometheus(self.metrics_file)
         
         return report
 
 
+def run_crawl_worker(settings, broker_path, partition, partitions, partition_by='url',
+                     log_options=None):
+    """Worker-process entry point for a distributed crawl"""
+    if log_options:
+        # Same logging as the coordinator, with an event log per worker
+        if log_options.get('event_log'):
+            log_options = dict(log_options, event_log=worker_path(log_options['event_log'], partition))
+        configure_logging(**log_options)
+    generator = EnhancedFinploySitemapGenerator(**settings)
+    broker = SQLiteBroker(broker_path)
+    try:
+        generator.run_worker(broker, partition, partitions, partition_by)
+    finally:
+        broker.close()
+
+
+def distributed_worker_settings(settings, partitions, partition):
+    """Generator settings for one worker of a distributed crawl
+    
+    The page budget is split across workers, each worker is its own
+    process (so it parses in-process), and cache files are per worker.
+    """
+    worker_settings = dict(settings)
+    worker_settings['max_urls'] = -(-settings.get('max_urls', 5000) // partitions)
+    worker_settings['parse_workers'] = 0
+    worker_settings['state_file'] = None
+    worker_settings.pop('metrics_file', None)
+    worker_settings.pop('metrics_port', None)
+    if settings.get('cache_file'):
+        worker_settings['cache_file'] = worker_path(settings['cache_file'], partition)
+    return worker_settings
+
+
+def load_site_profiles(path):
+    """Read a multi-site config: {"defaults": {...}, "sites": {name: {...}}}
+    
+    Returns {name: generator settings}; each site needs `base_urls`.
+    """
+    config = load_config(path)
+    defaults = config.get('defaults', {})
+    sites = config.get('sites')
+    if not sites:
+        raise ValueError(f"{path}: no sites configured")
+    profiles = {}
+    for name, site in sites.items():
+        profile = {**defaults, **site}
+        if not profile.get('base_urls'):
+            raise ValueError(f"{path}: site {name!r} has no base_urls")
+        profiles[name] = profile
+    return profiles
+
+
+def site_settings(name, profile, session):
+    """Generator settings for one site of a multi-site crawl
+    
+    `allowed_domains` defaults to the hosts of the site's base URLs, and
+    relative cache, state, manifest and metrics paths are placed in the
+    site's output directory (`sites/<name>` unless the profile sets one).
+    """
+    settings = {'crawl_mode': 'async', 'parse_workers': 0,
+                'cache_file': 'enhanced_sitemap_cache.db',
+                'state_file': 'enhanced_sitemap_state.db',
+                'allowed_domains': sorted({urlparse(url).hostname for url in profile['base_urls']}),
+                **profile}
+    output_dir = settings.pop('output_dir', None) or os.path.join('sites', name)
+    os.makedirs(output_dir, exist_ok=True)
+    for key in ('cache_file', 'state_file', 'sitemap_manifest', 'metrics_file'):
+        if settings.get(key) and not os.path.isabs(settings[key]):
+            settings[key] = os.path.join(output_dir, settings[key])
+    settings['crawl_mode'] = 'async'  # sites share one event loop
+    settings.update(site_name=name, output_dir=output_dir, session=session)
+    return settings
+
+
+def crawl_sites(profiles, total_concurrency=16, per_host_connections=8, gzip_shards=False,
+                dns_ttl=300):
+    """Crawl several site profiles concurrently in this process
+    
+    All sites share one keep-alive connection pool (at most
+    `per_host_connections` per host) and a DNS cache, and split
+    `total_concurrency` in-flight requests fairly between them. Each site
+    writes its own sitemap and report; returns {name: report or exception}.
+    """
+    hosts = {urlparse(url).hostname for profile in profiles.values() for url in profile['base_urls']}
+    session = make_session(pool_connections=max(10, len(hosts)),
+                           pool_maxsize=per_host_connections, pool_block=True)
+    share = FairShare(total_concurrency)
+    generators = {}
+    for name, profile in profiles.items():
+        generator = EnhancedFinploySitemapGenerator(**site_settings(name, profile, session))
+        generator.share = share
+        generators[name] = generator
+    
+    async def run_all():
+        results = await asyncio.gather(
+            *(generator.generate_site_async(gzip_shards) for generator in generators.values()),
+            return_exceptions=True)
+        return dict(zip(generators, results))
+    
+    dns = DNSCache(dns_ttl)
+    dns.install()
+    try:
+        results = asyncio.run(run_all())
+    finally:
+        dns.uninstall()
+        session.close()
+    for name, result in results.items():
+        if isinstance(result, Exception):
+            logging.getLogger(__name__).error("[%s] Site crawl failed: %s", name, result)
+    return results
+
+
 def main():
     """Enhanced main execution"""
+    parser = argparse.ArgumentParser(description="Enhanced Finploy Sitemap Generator")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue the last interrupted crawl from its checkpoint")
+    parser.add_argument('--config', metavar='JSON',
+                        help="JSON file of generator settings (e.g. job_keywords, locations)")
+    parser.add_argument('--gzip-shards', action='store_true',
+                        help="write gzip sitemap shards (sitemap-0001.xml.gz) plus sitemap_index.xml")
+    parser.add_argument('--incremental', nargs='?', const='enhanced_sitemap_manifest.db', metavar='MANIFEST',
+                        help="publish stable shards, rewriting only those changed since the run "
+                             "recorded in MANIFEST (default: enhanced_sitemap_manifest.db)")
+    parser.add_argument('--shard-by', choices=('url', 'category'), default='url',
+                        help="incremental shard assignment: hashed URL or URL category (default: url)")
+    parser.add_argument('--metrics-file', metavar='PATH',
+                        help="write Prometheus-format crawl metrics to PATH with the report")
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help="serve live Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument('--log-level', default='INFO', choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'),
+                        help="verbosity of enhanced_sitemap.log and the console (default: INFO)")
+    parser.add_argument('--log-sample', type=int, default=10, metavar='N',
+                        help="keep 1 in N per-page 'Crawling:' / 'Found N URLs' lines (default: 10; 1 keeps all)")
+    parser.add_argument('--event-log', metavar='PATH',
+                        help="also write JSON-lines events to PATH, with one crawl record per URL")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="run under cProfile, save the stats to PATH and print the top functions")
+    parser.add_argument('--workers', type=int, default=1, metavar='N',
+                        help="crawl with N worker processes, each owning one partition of the URL space")
+    parser.add_argument('--partition-by', choices=('url', 'host'), default='url',
+                        help="assign URLs to workers by hashed URL or by host (default: url)")
+    parser.add_argument('--broker', default='enhanced_sitemap_broker.db', metavar='PATH',
+                        help="SQLite database the coordinator and workers exchange links through")
+    parser.add_argument('--external-workers', action='store_true',
+                        help="coordinate only; start the workers separately with --worker-index")
+    parser.add_argument('--worker-index', type=int, metavar='I',
+                        help="run as worker I of --workers against a running coordinator's --broker")
+    parser.add_argument('--sites', metavar='CONFIG',
+                        help="JSON file of site profiles to crawl concurrently (see README)")
+    parser.add_argument('--total-concurrency', type=int, default=16,
+                        help="--sites: in-flight requests shared fairly between sites (default: 16)")
+    parser.add_argument('--per-host-connections', type=int, default=8,
+                        help="--sites: pooled connections per host (default: 8)")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.worker_index is not None and not 0 <= args.worker_index < args.workers:
+        parser.error("--worker-index must be between 0 and --workers - 1")
+    if args.resume and (args.workers > 1 or args.worker_index is not None):
+        parser.error("--resume is not supported for distributed crawls")
+    if args.log_sample < 1:
+        parser.error("--log-sample must be at least 1")
+    
+    if args.sites and (args.workers > 1 or args.worker_index is not None or args.resume
+                       or args.external_workers):
+        parser.error("--sites cannot be combined with distributed or resumed crawls")
+    if args.total_concurrency < 1 or args.per_host_connections < 1:
+        parser.error("--total-concurrency and --per-host-connections must be at least 1")
+    
+    configure_logging(event_log=args.event_log, level=args.log_level, sample=args.log_sample)
+    
+    if args.sites:
+        try:
+            profiles = load_site_profiles(args.sites)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        if args.incremental:
+            for profile in profiles.values():
+                profile.setdefault('sitemap_manifest', args.incremental)
+                profile.setdefault('shard_by', args.shard_by)
+        print(f"🚀 Crawling {len(profiles)} sites: {', '.join(profiles)}")
+        print("="*60)
+        results = crawl_sites(profiles, args.total_concurrency, args.per_host_connections,
+                              gzip_shards=args.gzip_shards)
+        print(f"\n📈 RESULTS BY SITE:")
+        for name, report in results.items():
+            if isinstance(report, Exception):
+                print(f"   ❌ {name}: {report}")
+                continue
+            print(f"   ✅ {name}: {report['total_urls_discovered']} URLs discovered, "
+                  f"{report['total_urls_crawled']} crawled, {report['failed_urls']} failed "
+                  f"→ {profiles[name].get('output_dir') or os.path.join('sites', name)}")
+        return
+    
     BASE_URLS = [
         'https://www.finploy.com',
         'https://finploy.co.uk'
@@ -478,20 +4115,65 @@ def main():
     print("🎯 Designed to discover maximum URLs efficiently")
     print("="*60)
     
-    generator = EnhancedFinploySitemapGenerator(
-        base_urls=BASE_URLS,
-        delay=0.5,
-        max_urls=3000
-    )
+    settings = {
+        'base_urls': BASE_URLS,
+        'delay': 0.5,
+        'max_urls': 3000,
+        'crawl_mode': 'async',
+        'concurrency': 8,
+        'per_host_concurrency': 4,
+        'parse_workers': max(1, (os.cpu_count() or 2) - 1),
+        'cache_file': 'enhanced_sitemap_cache.db',
+        'state_file': 'enhanced_sitemap_state.db'
+    }
+    if args.config:
+        settings.update(load_config(args.config))
+    if args.incremental:
+        settings['sitemap_manifest'] = args.incremental
+        settings['shard_by'] = args.shard_by
+    if args.metrics_file:
+        settings['metrics_file'] = args.metrics_file
+    if args.metrics_port:
+        settings['metrics_port'] = args.metrics_port
+    
+    if args.worker_index is not None:
+        # Worker only: the coordinator writes the sitemap and report
+        run_crawl_worker(distributed_worker_settings(settings, args.workers, args.worker_index),
+                         args.broker, args.worker_index, args.workers, args.partition_by,
+                         logging_options())
+        return
+    distributed = args.workers > 1 or args.external_workers
+    if distributed:
+        # Worker processes parse in-process; the coordinator keeps no pool
+        settings['parse_workers'] = 0
+    
+    generator = EnhancedFinploySitemapGenerator(**settings)
+    
+    # Optional deep dive: profile the main thread (fetch threads and parse workers are not included)
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
     
     try:
         start_time = time.time()
         
         # Generate enhanced sitemap
-        discovered_urls = generator.generate_enhanced_sitemap()
+        if distributed:
+            broker = SQLiteBroker(args.broker)
+            worker_settings = None if args.external_workers else [
+                distributed_worker_settings(settings, args.workers, partition)
+                for partition in range(args.workers)
+            ]
+            try:
+                discovered_urls = generator.run_coordinator(broker, args.workers, args.partition_by,
+                                                            worker_settings)
+            finally:
+                broker.close()
+        else:
+            discovered_urls = generator.generate_enhanced_sitemap(resume=args.resume)
         
         # Create outputs
-        generator.create_sitemap_xml(discovered_urls)
+        generator.create_sitemap_xml(discovered_urls, gzip_shards=args.gzip_shards)
         report = generator.generate_report()
         
         elapsed = (time.time() - start_time) / 60
@@ -510,8 +4192,22 @@ def main():
             if count > 0:
                 print(f"   {category.replace('_', ' ').title()}: {count}")
         
+        stages = report['performance']['stages']
+        if stages:
+            print(f"\n⏱️  Time by Stage (summed across workers):")
+            for stage, summary in sorted(stages.items(), key=lambda item: -item[1]['total_seconds']):
+                print(f"   {stage}: {summary['total_seconds']}s over {summary['count']} "
+                      f"(p50 {summary['p50_ms']}ms, p95 {summary['p95_ms']}ms)")
+        
         print(f"\n💾 Files Generated:")
-        print(f"   • enhanced_sitemap.xml ({report['total_urls_discovered']} URLs)")
+        incremental = report.get('incremental_sitemap')
+        if incremental:
+            print(f"   • {os.path.basename(incremental['index'])} ({incremental['urls']} URLs in "
+                  f"{incremental['shards']} shards, {incremental['shards_written']} rewritten)")
+            print(f"   • {os.path.basename(incremental['delta'])} ({incremental['urls_added']} added, "
+                  f"{incremental['urls_changed']} changed, {incremental['urls_removed']} removed)")
+        else:
+            print(f"   • enhanced_sitemap.xml ({report['total_urls_discovered']} URLs)")
         print(f"   • enhanced_sitemap_report.json")
         print(f"   • enhanced_sitemap.log")
         
@@ -524,15 +4220,26 @@ def main():
         
     except KeyboardInterrupt:
         print(f"\n⏹️  Stopped by user - saving results...")
+        generator.checkpoint()
         if generator.discovered_urls:
-            generator.create_sitemap_xml(generator.discovered_urls)
+            # Incremental runs keep the manifest's URLs this crawl did not reach
+            generator.create_sitemap_xml(generator.discovered_urls, gzip_shards=args.gzip_shards,
+                                         partial=True)
             generator.generate_report()
-            print("✅ Partial results saved!")
+            print("✅ Partial results saved! Run with --resume to continue.")
     except Exception as e:
         print(f"\n❌ Error: {e}")
+        generator.checkpoint()
         if generator.discovered_urls:
-            generator.create_sitemap_xml(generator.discovered_urls)
+            generator.create_sitemap_xml(generator.discovered_urls, gzip_shards=args.gzip_shards,
+                                         partial=True)
             generator.generate_report()
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"\n🔬 Profile saved: {args.profile} (top functions by cumulative time)")
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
 
 
 if __name__ == "__main__":
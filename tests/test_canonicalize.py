@@ -0,0 +1,66 @@
+import pytest
+
+from sitemap import DEFAULT_ALIAS_RULES, canonicalize_url, clean_url, compile_alias_rules
+
+ALIASES = compile_alias_rules(DEFAULT_ALIAS_RULES)
+
+
+def canonical(url):
+    return canonicalize_url(url, ALIASES)
+
+
+@pytest.mark.parametrize('alias', [
+    'https://www.finploy.com/index.php',
+    'https://www.finploy.com/index.html',
+    'https://www.finploy.com/index.htm',
+    'https://www.finploy.com',
+    'HTTPS://WWW.Finploy.com:443/',
+    'https://www.finploy.com/#top',
+])
+def test_home_page_aliases(alias):
+    assert canonical(alias) == 'https://www.finploy.com/'
+
+
+@pytest.mark.parametrize('alias', [
+    'https://www.finploy.com/jobs/',
+    'https://www.finploy.com/jobs//',
+    'https://www.finploy.com:443/jobs',
+    'https://www.finploy.com/jobs/index.php',
+])
+def test_path_aliases(alias):
+    assert canonical(alias) == 'https://www.finploy.com/jobs'
+
+
+def test_alias_rules_only_touch_the_path():
+    assert canonical('https://www.finploy.com/Jobs/') == 'https://www.finploy.com/Jobs'
+    assert canonical('https://www.finploy.com/jobs/index.php.bak') == 'https://www.finploy.com/jobs/index.php.bak'
+
+
+def test_non_default_port_is_kept():
+    assert canonical('http://www.finploy.com:8080/jobs') == 'http://www.finploy.com:8080/jobs'
+    assert canonical('http://www.finploy.com:443/jobs') == 'http://www.finploy.com:443/jobs'
+
+
+def test_query_is_sorted_and_tracking_params_dropped():
+    url = 'https://www.finploy.com/jobs?page=2&utm_source=mail&city=pune&UTM_Medium=x&gclid=1&fbclid=2'
+    assert canonical(url) == 'https://www.finploy.com/jobs?city=pune&page=2'
+    assert canonical('https://www.finploy.com/jobs?city=pune&page=2') == canonical(url)
+
+
+def test_query_with_only_tracking_params_is_dropped():
+    assert canonical('https://www.finploy.com/jobs/?utm_campaign=x&_ga=1') == 'https://www.finploy.com/jobs'
+
+
+def test_blank_values_are_kept():
+    assert canonical('https://www.finploy.com/search?q=&b=1') == 'https://www.finploy.com/search?b=1&q='
+
+
+def test_no_alias_rules():
+    assert canonicalize_url('https://www.finploy.com/jobs/') == 'https://www.finploy.com/jobs/'
+
+
+def test_clean_url_keeps_the_linked_spelling():
+    url = 'https://www.finploy.com/Jobs/?page=2&utm_source=mail&city=pune#list'
+    assert clean_url(url) == 'https://www.finploy.com/Jobs/?page=2&city=pune'
+    assert clean_url('https://www.finploy.com/jobs?utm_source=mail') == 'https://www.finploy.com/jobs'
+    assert clean_url('https://www.finploy.com/jobs?%75tm_source=mail&a=1') == 'https://www.finploy.com/jobs?a=1'
@@ -0,0 +1,107 @@
+import hashlib
+
+import pytest
+from bs4 import BeautifulSoup
+
+from sitemap import DuplicateIndex, page_fingerprint, simhash, soup_fingerprint, tokenize_page
+
+BASE = 0x0123456789ABCDEF
+
+
+def body_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def flip(fingerprint, bits):
+    for bit in bits:
+        fingerprint ^= 1 << bit
+    return fingerprint
+
+
+def spread_bits(count):
+    # One flipped bit per 16-bit band: the worst case for the band lookup
+    return [band * 16 + 5 for band in range(count)]
+
+
+@pytest.mark.parametrize('distance', [0, 1, 2, 3])
+def test_near_match_within_distance(distance):
+    index = DuplicateIndex(max_distance=3)
+    index.add('https://www.finploy.com/a', body_hash('a'), BASE)
+    assert index.find_near(flip(BASE, spread_bits(distance))) == 'https://www.finploy.com/a'
+
+
+def test_no_near_match_beyond_distance():
+    index = DuplicateIndex(max_distance=3)
+    index.add('https://www.finploy.com/a', body_hash('a'), BASE)
+    assert index.find_near(flip(BASE, [1, 2, 3, 4])) is None  # all in one band
+    assert index.find_near(flip(BASE, spread_bits(4))) is None
+
+
+@pytest.mark.parametrize('max_distance', [0, 1, 2])
+def test_threshold_is_configurable(max_distance):
+    index = DuplicateIndex(max_distance=max_distance)
+    index.add('https://www.finploy.com/a', body_hash('a'), BASE)
+    assert index.find_near(flip(BASE, spread_bits(max_distance))) is not None
+    assert index.find_near(flip(BASE, spread_bits(max_distance + 1))) is None
+
+
+def test_threshold_is_capped_by_the_bands():
+    # Beyond BANDS - 1 bits two fingerprints may share no band at all
+    assert DuplicateIndex(max_distance=10).max_distance == DuplicateIndex.BANDS - 1
+
+
+def test_pages_without_fingerprint_only_match_exactly():
+    index = DuplicateIndex()
+    index.add('https://www.finploy.com/a', body_hash('a'))
+    assert index.find_near(None) is None
+    assert index.find_exact(body_hash('a')) == 'https://www.finploy.com/a'
+    assert index.find_exact(body_hash('b')) is None
+
+
+def test_first_page_stays_the_exact_match():
+    index = DuplicateIndex()
+    index.add('https://www.finploy.com/a', body_hash('same'))
+    index.add('https://www.finploy.com/b', body_hash('same'))
+    assert index.find_exact(body_hash('same')) == 'https://www.finploy.com/a'
+
+
+def test_simhash_distance_grows_with_changes():
+    words = {f"word{i}" for i in range(200)}
+    fingerprint = simhash(words)
+    assert simhash(set(words)) == fingerprint
+    one_changed = bin(fingerprint ^ simhash(words - {'word0'} | {'other0'})).count('1')
+    many_changed = bin(fingerprint ^ simhash({f"other{i}" for i in range(200)})).count('1')
+    assert one_changed <= 3 < many_changed
+
+
+def test_short_pages_get_no_fingerprint():
+    assert page_fingerprint('too few words here', set()) is None
+
+
+WORDS = ' '.join(f"word{i}" for i in range(60))
+
+
+def templated_page(variant):
+    nav = ''.join(f'<a href="/nav/{variant}/{i}">menu {variant} {i}</a>' for i in range(20))
+    return (f'<html><body><header>site {variant}</header><nav>{nav}</nav>'
+            f'<main><p>{WORDS}</p><a href="/jobs/1">apply</a></main>'
+            f'<aside>related {variant}</aside><footer>footer {variant} <a href="/f/{variant}">f</a></footer>'
+            f'<script>var tracking = "{variant}";</script></body></html>')
+
+
+def test_template_blocks_do_not_change_the_fingerprint():
+    first, second = tokenize_page(templated_page('a')), tokenize_page(templated_page('b'))
+    assert first.fingerprint() is not None
+    assert first.fingerprint() == second.fingerprint()
+
+
+def test_content_changes_do_change_the_fingerprint():
+    page = templated_page('a')
+    changed = page.replace('word1 word2 word3 word4', 'other1 other2 other3 other4')
+    assert tokenize_page(page).fingerprint() != tokenize_page(changed).fingerprint()
+
+
+@pytest.mark.parametrize('variant', ['a', 'b'])
+def test_soup_and_tokenizer_fingerprints_agree(variant):
+    html = templated_page(variant)
+    assert soup_fingerprint(BeautifulSoup(html, 'html.parser')) == tokenize_page(html).fingerprint()
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from sitemap import IncrementalSitemap, url_hash
+
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    monkeypatch.setattr(IncrementalSitemap, 'TARGET_URLS', 10)
+
+
+def job_urls(count, start=0):
+    return [f"https://www.finploy.com/jobs/{i}" for i in range(start, start + count)]
+
+
+def publish(tmp_path, urls, prefix='shard'):
+    """One run: publish `urls`, return (stats, {url: shard}, {prefix: buckets})"""
+    sitemap = IncrementalSitemap(str(tmp_path / 'manifest.db'), str(tmp_path), 'https://www.finploy.com')
+    try:
+        for url in urls:
+            sitemap.add(url, prefix(url) if callable(prefix) else prefix, '2026-01-01', 'daily', '0.8')
+        stats = sitemap.publish('2026-01-01')
+        shards = dict(sitemap.conn.execute('SELECT url, shard FROM entries'))
+        buckets = dict(sitemap.conn.execute('SELECT prefix, buckets FROM prefixes'))
+    finally:
+        sitemap.close()
+    return stats, shards, buckets
+
+
+def test_same_urls_keep_their_shards(tmp_path, small_shards):
+    urls = job_urls(35)
+    stats, first, _ = publish(tmp_path, urls)
+    assert stats['shards_written'] == stats['shards'] == 4
+    stats, second, _ = publish(tmp_path, list(reversed(urls)))
+    assert second == first
+    assert stats['shards_written'] == 0
+
+
+def test_url_keeps_its_shard_after_the_bucket_count_grows(tmp_path, small_shards):
+    urls = job_urls(15)
+    _, before, buckets = publish(tmp_path, urls)
+    assert buckets == {'shard': 2}
+
+    added = job_urls(30, start=15)
+    _, after, buckets = publish(tmp_path, urls + added)
+    assert buckets == {'shard': 8}
+    assert {url: after[url] for url in urls} == before
+    # New URLs are hashed over every bucket of the grown prefix
+    assert all(after[url] == f"shard-{url_hash(url) % 8:04d}" for url in added)
+    assert len({after[url] for url in added}) > 2
+
+
+def test_growth_of_one_prefix_leaves_other_prefixes_alone(tmp_path, small_shards):
+    def category(url):
+        return 'jobs' if '/jobs/' in url else 'companies'
+
+    companies = [f"https://www.finploy.com/companies/{i}" for i in range(15)]
+    _, before, _ = publish(tmp_path, companies + job_urls(5), category)
+    stats, after, buckets = publish(tmp_path, companies + job_urls(60), category)
+    assert buckets == {'companies': 2, 'jobs': 8}
+    assert {url: after[url] for url in companies} == {url: before[url] for url in companies}
+    assert not any(name.startswith('companies-') for name in map(os.path.basename, stats['files']))
+
+
+def test_oversized_shard_rehashes_its_prefix(tmp_path, monkeypatch):
+    monkeypatch.setattr(IncrementalSitemap, 'TARGET_URLS', 1000)
+    monkeypatch.setattr('sitemap.SitemapWriter.MAX_URLS', 8)
+    _, shards, buckets = publish(tmp_path, job_urls(20))
+    assert buckets['shard'] >= 4
+    counts = {}
+    for shard in shards.values():
+        counts[shard] = counts.get(shard, 0) + 1
+    assert max(counts.values()) <= 8
+    assert all(shard == f"shard-{url_hash(url) % buckets['shard']:04d}" for url, shard in shards.items())
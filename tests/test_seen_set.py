@@ -0,0 +1,90 @@
+import pytest
+
+from sitemap import URLSeenSet, URLTable, url_fingerprint
+
+
+def job_urls(count, start=0):
+    return [f"https://www.finploy.com/jobs/{i}" for i in range(start, start + count)]
+
+
+def test_fingerprint_membership_survives_growth():
+    seen = URLSeenSet('fingerprint')
+    urls = job_urls(5000)  # several table doublings from the initial 1024 slots
+    assert all(seen.add(url) for url in urls)
+    assert len(seen) == 5000
+    assert all(url in seen for url in urls)
+    assert not any(url in seen for url in job_urls(5000, start=5000))
+
+
+def test_add_reports_repeats():
+    seen = URLSeenSet('fingerprint')
+    assert seen.add('https://www.finploy.com/jobs')
+    assert not seen.add('https://www.finploy.com/jobs')
+    assert len(seen) == 1
+
+
+def test_fingerprint_is_never_zero():
+    # 0 marks an empty slot in the open-addressing table
+    assert all(url_fingerprint(url) != 0 for url in job_urls(1000))
+
+
+def test_bloom_has_no_false_negatives():
+    seen = URLSeenSet('bloom', expected_items=2000, error_rate=0.01)
+    urls = job_urls(2000)
+    for url in urls:
+        seen.add(url)
+    assert all(url in seen for url in urls)
+
+
+def test_bloom_false_positive_rate_stays_near_target():
+    seen = URLSeenSet('bloom', expected_items=2000, error_rate=0.01)
+    for url in job_urls(2000):
+        seen.add(url)
+    unseen = job_urls(20000, start=2000)
+    false_positives = sum(url in seen for url in unseen)
+    assert false_positives / len(unseen) < 0.02
+
+
+def test_bloom_false_positive_is_reported_as_seen():
+    # A false "seen" answer makes add() return False, so the URL is skipped
+    seen = URLSeenSet('bloom', expected_items=10, error_rate=0.5)
+    for url in job_urls(50):
+        seen.add(url)
+    unseen = next(url for url in job_urls(10000, start=50) if url in seen)
+    assert not seen.add(unseen)
+
+
+def test_iteration_needs_keep_urls():
+    with pytest.raises(TypeError):
+        list(URLSeenSet('fingerprint'))
+
+
+def test_iteration_yields_urls_in_insertion_order():
+    seen = URLSeenSet('fingerprint', keep_urls=True)
+    urls = job_urls(100)
+    for url in urls + urls[:10]:
+        seen.add(url)
+    assert list(seen) == urls
+    # Iterating leaves the spool ready for more URLs
+    seen.add('https://www.finploy.com/about')
+    assert list(seen)[-1] == 'https://www.finploy.com/about'
+
+
+def test_url_table_behaves_like_a_dict():
+    table = URLTable()
+    url = 'https://www.finploy.com/jobs'
+    assert table.get(url) is None
+    assert table.get(url, url) == url
+    assert url not in table
+    with pytest.raises(KeyError):
+        table[url]
+
+    table[url] = 'https://www.finploy.com/jobs/'
+    table[url] = 'https://www.finploy.com/jobs/?page=1'
+    assert url in table
+    assert table[url] == 'https://www.finploy.com/jobs/?page=1'
+    assert len(table) == 1
+
+    assert table.pop(url) == 'https://www.finploy.com/jobs/?page=1'
+    assert table.pop(url, 'gone') == 'gone'
+    assert len(table) == 0